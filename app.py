@@ -3,6 +3,7 @@ Main Streamlit application file (Landing Page).
 """
 
 import streamlit as st
+from app.startup import record_first_render
 
 st.set_page_config(
     layout="wide", 
@@ -40,3 +41,4 @@ def main():
 
 if __name__ == "__main__":
     main()
+    record_first_render("Landing Page")
@@ -0,0 +1,242 @@
+"""
+Sharded multi-core aggregation engine.
+
+Large groupbys are split into shards that run on a shared worker pool:
+  * By key (shard_key): rows are hashed on a grouping column such as
+    CustomerID, so every group lives in exactly one shard and the shard
+    results are simply concatenated.
+  * By row range (default): the frame is cut into contiguous slices without
+    copying; in the OrderDate-sorted sales data these are runs of order
+    months. Each shard computes partial aggregates (sums, counts, min/max and
+    distinct sets) that are merged into the final result.
+
+The pool is a thread pool by default: pandas releases the GIL in its numeric
+groupby kernels, and shards need no pickling. Hashing object (string) keys
+holds the GIL, so for string-heavy groupbys a process pool
+(Config.AGGREGATION_EXECUTOR = "process") scales better despite the cost of
+shipping shards to the workers. Small frames take the serial path, where
+sharding would cost more than it saves.
+
+Sharding is off by default (Config.AGGREGATION_WORKERS = 1): on a single CPU
+the sharded path measured 0.46-1.0x the serial speed. Enable it only where
+the benchmark below shows a speedup on the target machine.
+
+Usage (benchmark against the serial path on synthetic data):
+    python -m app.aggregation --orders 300000 --repeat 3
+"""
+
+import argparse
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from app.config import Config
+
+# Functions with a mergeable partial: how the partials of each are combined
+_MERGE_FUNCS = {"sum": "sum", "count": "sum", "size": "sum", "min": "min", "max": "max"}
+SUPPORTED_FUNCS = set(_MERGE_FUNCS) | {"nunique"}
+
+# Below this many rows per shard the serial path is faster
+MIN_SHARD_ROWS = 50_000
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+def worker_count() -> int:
+    """Number of aggregation workers (Config.AGGREGATION_WORKERS, 0 = one per CPU, 1 = serial)."""
+    return Config.AGGREGATION_WORKERS or os.cpu_count() or 1
+
+def _get_pool() -> Executor:
+    """Returns the process-wide worker pool, creating it on first use."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            if Config.AGGREGATION_EXECUTOR == "process":
+                _POOL = ProcessPoolExecutor(max_workers=worker_count())
+            else:
+                _POOL = ThreadPoolExecutor(max_workers=worker_count(), thread_name_prefix="aggregation")
+        return _POOL
+
+def _serial(df: pd.DataFrame, by: List[str], aggregations: Dict[str, Tuple[str, str]]) -> pd.DataFrame:
+    """The reference single-threaded groupby."""
+    return df.groupby(by, sort=True).agg(**aggregations).reset_index()
+
+def _shard_by_key(df: pd.DataFrame, shard_key: str, n_shards: int) -> List[pd.DataFrame]:
+    """Splits rows into shards so that equal shard_key values share a shard."""
+    codes, _ = pd.factorize(df[shard_key])
+    shard_ids = codes % n_shards  # Missing keys (-1) land in the last shard
+    order = np.argsort(shard_ids, kind='stable')
+    bounds = np.searchsorted(shard_ids[order], np.arange(1, n_shards))
+    return [df.take(rows) for rows in np.split(order, bounds) if len(rows)]
+
+def _shard_by_rows(df: pd.DataFrame, n_shards: int) -> List[pd.DataFrame]:
+    """Cuts the frame into contiguous slices (views, not copies)."""
+    bounds = np.linspace(0, len(df), n_shards + 1, dtype=int)
+    return [df.iloc[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+
+def _partial(shard: pd.DataFrame, by: List[str], aggregations: Dict[str, Tuple[str, str]]) -> dict:
+    """Computes the mergeable partial aggregates of one row-range shard.
+
+    Returns:
+        dict: "groups" holds the row count per group and "simple" one partial
+        per mergeable aggregation. Each distinct count is a set of distinct
+        (group number, value) pairs instead, numbered like "groups".
+    """
+    grouped = shard.groupby(by, sort=False)
+    simple = {name: spec for name, spec in aggregations.items() if spec[1] != "nunique"}
+    partial = {"groups": grouped.size(), "simple": grouped.agg(**simple) if simple else None}
+
+    distinct_columns = [column for column, func in aggregations.values() if func == "nunique"]
+    if distinct_columns:
+        group_numbers = grouped.ngroup().fillna(-1).to_numpy(dtype=np.int64)  # -1: missing key
+        for name, (column, func) in aggregations.items():
+            if func == "nunique":
+                pairs = pd.DataFrame({'group': group_numbers, 'value': shard[column].to_numpy()})
+                partial[name] = pairs[pairs['group'] >= 0].dropna().drop_duplicates()
+    return partial
+
+def _merge(partials: List[dict], by: List[str], aggregations: Dict[str, Tuple[str, str]]) -> pd.DataFrame:
+    """Merges row-range partials into the final aggregate."""
+    groups = pd.concat([p["groups"] for p in partials]).groupby(level=by, sort=True).sum().index
+    result = pd.DataFrame(index=groups)
+    if partials[0]["simple"] is not None:
+        merged = pd.concat([p["simple"] for p in partials]).groupby(level=by, sort=True)
+        for name, (_, func) in aggregations.items():
+            if func != "nunique":
+                result[name] = merged[name].agg(_MERGE_FUNCS[func])
+
+    # Renumber each shard's groups to the merged groups, then union the distinct sets
+    renumbering = [groups.get_indexer(p["groups"].index) for p in partials]
+    for name, (_, func) in aggregations.items():
+        if func == "nunique":
+            distinct = pd.concat(
+                [p[name].assign(group=mapping[p[name]['group'].to_numpy()]) for p, mapping in zip(partials, renumbering)],
+                ignore_index=True
+            ).drop_duplicates()
+            # Groups whose values are all missing count zero, as in pandas
+            result[name] = np.bincount(distinct['group'].to_numpy(), minlength=len(groups))
+    return result[list(aggregations)].reset_index()
+
+def aggregate(df: pd.DataFrame, by: Union[str, List[str]], aggregations: Dict[str, Tuple[str, str]],
+              shard_key: str = None, workers: int = None) -> pd.DataFrame:
+    """Groups and aggregates a DataFrame, sharded across the worker pool.
+
+    The result equals df.groupby(by).agg(**aggregations).reset_index().
+
+    Args:
+        df (pd.DataFrame): The fact data.
+        by (str | List[str]): The grouping column(s).
+        aggregations (dict): Output column -> (input column, function), with
+            functions from SUPPORTED_FUNCS.
+        shard_key (str, optional): A column of `by` to shard on, so each group
+            is aggregated in one shard. Default: contiguous row ranges with
+            partial aggregates merged afterwards.
+        workers (int, optional): Number of shards; defaults to worker_count().
+
+    Returns:
+        pd.DataFrame: One row per group, sorted by the grouping columns.
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    unsupported = {func for _, func in aggregations.values()} - SUPPORTED_FUNCS
+    if unsupported:
+        raise ValueError(f"Unsupported aggregation functions: {sorted(unsupported)}")
+    if shard_key is not None and shard_key not in by:
+        raise ValueError(f"The shard key '{shard_key}' must be one of the grouping columns.")
+
+    n_shards = min(workers or worker_count(), len(df) // MIN_SHARD_ROWS)
+    if n_shards <= 1:
+        return _serial(df, by, aggregations)
+
+    pool = _get_pool()
+    if shard_key is not None:
+        # Only the needed columns are copied into the shards
+        columns = list(dict.fromkeys(by + [column for column, _ in aggregations.values()]))
+        shards = _shard_by_key(df[columns], shard_key, n_shards)
+        results = list(pool.map(partial(_serial, by=by, aggregations=aggregations), shards))
+        return pd.concat(results, ignore_index=True).sort_values(by, ignore_index=True)
+
+    shards = _shard_by_rows(df, n_shards)
+    partials = list(pool.map(partial(_partial, by=by, aggregations=aggregations), shards))
+    return _merge(partials, by, aggregations)
+
+# --- Benchmark ---
+
+def _benchmark_cases() -> Dict[str, dict]:
+    """The heavy groupbys of the pipeline and pages."""
+    return {
+        "RFM (by customer, sharded on CustomerID)": dict(
+            by='CustomerID', shard_key='CustomerID',
+            aggregations={'LastOrder': ('OrderDate', 'max'), 'Frequency': ('OrderID', 'nunique'),
+                          'MonetaryValue': ('Revenue', 'sum')}),
+        "Supplier stats (row-range shards)": dict(
+            by='SupplierName',
+            aggregations={'Revenue': ('Revenue', 'sum'), 'Orders': ('OrderID', 'nunique'),
+                          'Products': ('ProductID', 'nunique')}),
+        "Product performance (row-range shards)": dict(
+            by=['ProductID', 'ProductName', 'CategoryName'],
+            aggregations={'Revenue': ('Revenue', 'sum'), 'Quantity': ('Quantity', 'sum')}),
+    }
+
+def run_benchmark(n_orders: int, repeat: int = 3, workers: int = None) -> List[dict]:
+    """Times the serial and sharded paths on synthetic sales data.
+
+    Args:
+        n_orders (int): Size of the synthetic dataset in orders.
+        repeat (int): Timed runs per path; the best run is reported.
+        workers (int, optional): Number of shards; defaults to worker_count().
+
+    Returns:
+        List[dict]: Per case: rows, serial and sharded seconds and speedup.
+    """
+    from app.etl.synthetic import generate_northwind_tables
+    from app.etl.transform import create_comprehensive_sales_data
+
+    tables = generate_northwind_tables(n_orders)
+    sales_data = create_comprehensive_sales_data(**tables).sort_values('OrderDate', kind='stable', ignore_index=True)
+
+    def best_of(func) -> float:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    results = []
+    for name, case in _benchmark_cases().items():
+        by = [case['by']] if isinstance(case['by'], str) else case['by']
+        expected = _serial(sales_data, by, case['aggregations'])
+        pd.testing.assert_frame_equal(aggregate(sales_data, workers=workers, **case), expected, check_dtype=False)
+
+        serial_s = best_of(lambda: _serial(sales_data, by, case['aggregations']))
+        sharded_s = best_of(lambda: aggregate(sales_data, workers=workers, **case))
+        results.append({"case": name, "rows": len(sales_data), "serial_s": serial_s,
+                        "sharded_s": sharded_s, "speedup": serial_s / sharded_s})
+    return results
+
+def main():
+    """Command-line entry point for the benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark sharded vs. serial aggregation.")
+    parser.add_argument("--orders", type=int, default=300_000, help="Synthetic dataset size in orders.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per path (best is reported).")
+    parser.add_argument("--workers", type=int, default=0, help="Workers and shards (default: one per CPU).")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    Config.AGGREGATION_WORKERS = args.workers  # The benchmark always measures the sharded path
+    results = run_benchmark(args.orders, args.repeat)
+    print(f"Workers: {worker_count()} ({Config.AGGREGATION_EXECUTOR})  "
+          f"CPUs: {os.cpu_count()}  Rows: {results[0]['rows']:,}\n")
+    print(f"{'serial s':>9} {'sharded s':>10} {'speedup':>8}  case")
+    for row in results:
+        print(f"{row['serial_s']:>9.3f} {row['sharded_s']:>10.3f} {row['speedup']:>7.2f}x  {row['case']}")
+
+if __name__ == "__main__":
+    main()
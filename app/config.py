@@ -15,13 +15,56 @@ class Config:
     DB_DATABASE = os.getenv("DB_DATABASE")
     DB_USERNAME = os.getenv("DB_USERNAME")
     DB_PASSWORD = os.getenv("DB_PASSWORD")
+    # Optional SQLAlchemy URL that overrides the settings above (e.g. sqlite:///northwind.db)
+    DB_URL = os.getenv("DB_URL", "")
+
+    # Data mode: "in_memory" (ETL into pandas) or "direct" (aggregations run in SQL)
+    DATA_MODE = os.getenv("DATA_MODE", "in_memory")
+    DIRECT_QUERY_TTL_SECONDS = int(os.getenv("DIRECT_QUERY_TTL_SECONDS", "600"))
+
+    # Data source: "database" (SQL Server) or "synthetic" (generated, for load tests)
+    DATA_SOURCE = os.getenv("DATA_SOURCE", "database")
+    SYNTHETIC_ORDERS = int(os.getenv("SYNTHETIC_ORDERS", "830"))
+
+    # Distinct counts: "exact" (nunique) or "approx" (HyperLogLog sketches)
+    DISTINCT_COUNT_MODE = os.getenv("DISTINCT_COUNT_MODE", "exact")
+    HLL_PRECISION = int(os.getenv("HLL_PRECISION", "11"))
+
+    # Sharded aggregation workers (1 = serial, the default; 0 = one per CPU)
+    AGGREGATION_WORKERS = int(os.getenv("AGGREGATION_WORKERS", "1"))
+    AGGREGATION_EXECUTOR = os.getenv("AGGREGATION_EXECUTOR", "thread")  # "thread" or "process"
+
+    # Downloads: total size of the finished export files kept in memory
+    EXPORT_CACHE_MAX_MB = int(os.getenv("EXPORT_CACHE_MAX_MB", "64"))
+
+    # Shipping analytics: SLA target and histogram cap (days)
+    SHIPPING_SLA_DAYS = int(os.getenv("SHIPPING_SLA_DAYS", "7"))
+    SHIPPING_HISTOGRAM_MAX_DAYS = int(os.getenv("SHIPPING_HISTOGRAM_MAX_DAYS", "60"))
+
+    # Table refresh cadence (see app/etl/refresh.py): facts vs. slow-moving dimensions
+    FACT_REFRESH_SECONDS = int(os.getenv("FACT_REFRESH_SECONDS", "300"))
+    DIMENSION_REFRESH_SECONDS = int(os.getenv("DIMENSION_REFRESH_SECONDS", "86400"))
+
+    # Cold start: on-disk snapshot of the ETL output (disabled when unset)
+    DATA_SNAPSHOT_DIR = os.getenv("DATA_SNAPSHOT_DIR", "")
+    SNAPSHOT_MAX_AGE_SECONDS = int(os.getenv("SNAPSHOT_MAX_AGE_SECONDS", "3600"))
+    SNAPSHOT_FULL_REBUILD_SECONDS = int(os.getenv("SNAPSHOT_FULL_REBUILD_SECONDS", "86400"))
+    WARMUP_ON_BOOT = os.getenv("WARMUP_ON_BOOT", "false").lower() == "true"
+
+    # Developer profiling: per-rerun section timings, cache hits and chart payloads
+    PROFILE_RENDERS = os.getenv("PROFILE_RENDERS", "false").lower() == "true"
+    PROFILE_LOG_PATH = os.getenv("PROFILE_LOG_PATH", "")  # Optional JSON-lines file
 
     @staticmethod
     def get_db_connection_string() -> str:
         """Constructs the database connection string.
 
         Supports both SQL Server Authentication and Windows Authentication.
+        A DB_URL, when set, is used as-is.
         """
+        if Config.DB_URL:
+            return Config.DB_URL
+
         if Config.DB_USERNAME and Config.DB_PASSWORD:
             # SQL Server Authentication
             return (
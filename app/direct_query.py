@@ -0,0 +1,242 @@
+"""
+Direct-query mode: sidebar filters and page aggregations compiled to SQL.
+
+Instead of extracting every order line into pandas, each page asks the
+database for exactly the aggregate it charts with a parameterized GROUP BY
+query over the Northwind schema, so only aggregates cross the wire. Results
+are cached per filter state. SQL Server and SQLite (see
+app/etl/northwind_sqlite.py) are supported.
+
+Filters are plain dicts, as built by app.ui.shared_components.current_filters:
+    start_date, end_date (datetime.date): Inclusive order date range.
+    countries (tuple): Customer countries to include.
+    categories (tuple | None): Product categories to include; None means all.
+Any missing or None entry leaves that dimension unfiltered.
+"""
+
+import logging
+from datetime import timedelta
+from typing import Union
+
+import pandas as pd
+import streamlit as st
+
+from .config import Config
+from .etl.utils import map_country_to_region, map_country_to_iso3
+from .profiling import profiled_cache
+from .sketches import HistogramCube
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# --- Dialect-specific SQL expressions ---
+_DIALECTS = {
+    "mssql": {
+        "order_day": "CAST(o.OrderDate AS date)",
+        "employee_name": "e.FirstName + ' ' + e.LastName",
+        "shipping_days": "DATEDIFF(day, o.OrderDate, o.ShippedDate)",
+        "date_format": "%Y%m%d",  # Unambiguous under any DATEFORMAT setting
+    },
+    "sqlite": {
+        "order_day": "date(o.OrderDate)",
+        "employee_name": "e.FirstName || ' ' || e.LastName",
+        "shipping_days": "CAST(julianday(o.ShippedDate) - julianday(o.OrderDate) AS INTEGER)",
+        "date_format": "%Y-%m-%d",
+    },
+}
+
+REVENUE = 'od.UnitPrice * od.Quantity * (1 - od.Discount)'
+
+# Line-item grain, with the same left joins as create_comprehensive_sales_data
+SALES_FROM = '''
+FROM [Order Details] od
+LEFT JOIN Products p ON p.ProductID = od.ProductID
+LEFT JOIN Categories c ON c.CategoryID = p.CategoryID
+LEFT JOIN Suppliers s ON s.SupplierID = p.SupplierID
+LEFT JOIN Orders o ON o.OrderID = od.OrderID
+LEFT JOIN Customers cu ON cu.CustomerID = o.CustomerID
+LEFT JOIN Employees e ON e.EmployeeID = o.EmployeeID
+LEFT JOIN Shippers sh ON sh.ShipperID = o.ShipVia
+'''
+
+_LIST_FILTERS = {"countries": "cu.Country", "categories": "c.CategoryName"}
+
+@st.cache_resource
+def get_direct_engine():
+    """Creates the shared SQLAlchemy engine for direct queries (None on failure)."""
+    # Deferred: SQLAlchemy and the database driver are only needed in this mode
+    from .etl.extract import get_db_engine
+    return get_db_engine(Config.get_db_connection_string())
+
+def _dialect(engine) -> dict:
+    """Returns the SQL expressions for the engine's dialect."""
+    try:
+        return _DIALECTS[engine.dialect.name]
+    except KeyError:
+        raise ValueError(f"Direct-query mode does not support the '{engine.dialect.name}' dialect.") from None
+
+def _where(filters: dict, dialect: dict, conditions: tuple = ()):
+    """Compiles a filters dict (plus fixed conditions) to a WHERE clause and its bind parameters."""
+    clauses, params = list(conditions), {}
+    if filters.get("start_date") is not None:
+        clauses.append("o.OrderDate >= :start_date")
+        params["start_date"] = filters["start_date"].strftime(dialect["date_format"])
+    if filters.get("end_date") is not None:
+        clauses.append("o.OrderDate < :end_date")
+        params["end_date"] = (filters["end_date"] + timedelta(days=1)).strftime(dialect["date_format"])
+    for name, column in _LIST_FILTERS.items():
+        if filters.get(name) is not None:
+            clauses.append(f"{column} IN :{name}")
+            params[name] = list(filters[name])
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+def run_query(sql: str, filters: dict = None, conditions: tuple = ()) -> Union[pd.DataFrame, None]:
+    """Runs a query template against the direct-query database.
+
+    Args:
+        sql (str): SQL with {where} and optional dialect placeholders
+            ({order_day}, {employee_name}, {shipping_days}).
+        filters (dict, optional): Filters compiled into {where}.
+        conditions (tuple): Fixed SQL conditions added to {where}.
+
+    Returns:
+        pd.DataFrame | None: The result set, or None if the database is unavailable.
+    """
+    from sqlalchemy import bindparam, text
+    from sqlalchemy.exc import SQLAlchemyError
+
+    engine = get_direct_engine()
+    if engine is None:
+        return None
+
+    dialect = _dialect(engine)
+    where, params = _where(filters or {}, dialect, conditions)
+    statement = text(sql.format(where=where, revenue=REVENUE, sales_from=SALES_FROM, **dialect))
+    expanding = [bindparam(name, expanding=True) for name in _LIST_FILTERS if name in params]
+    if expanding:
+        statement = statement.bindparams(*expanding)
+
+    try:
+        with engine.connect() as connection:
+            df = pd.read_sql_query(statement, connection, params=params)
+    except SQLAlchemyError as e:
+        logging.error(f"Direct query failed: {e}")
+        return None
+    logging.info(f"Direct query returned {len(df)} rows.")
+    return df
+
+# --- Page Aggregates ---
+
+@profiled_cache(st.cache_data(ttl=Config.DIRECT_QUERY_TTL_SECONDS))
+def query_filter_options() -> Union[dict, None]:
+    """Fetches the values the sidebar controls offer.
+
+    Returns:
+        dict | None: first_order and last_order dates, the customer countries
+        with orders and the category names.
+    """
+    date_range = run_query("SELECT MIN(o.OrderDate) AS FirstOrder, MAX(o.OrderDate) AS LastOrder FROM Orders o")
+    countries = run_query(
+        "SELECT DISTINCT cu.Country FROM Orders o JOIN Customers cu ON cu.CustomerID = o.CustomerID"
+    )
+    categories = run_query("SELECT CategoryName FROM Categories")
+    if date_range is None or countries is None or categories is None:
+        return None
+
+    return {
+        "first_order": pd.Timestamp(date_range['FirstOrder'].iloc[0]).date(),
+        "last_order": pd.Timestamp(date_range['LastOrder'].iloc[0]).date(),
+        "countries": sorted(countries['Country'].dropna()),
+        "categories": sorted(categories['CategoryName'].dropna()),
+    }
+
+@profiled_cache(st.cache_data(ttl=Config.DIRECT_QUERY_TTL_SECONDS))
+def query_kpis(filters: dict) -> Union[dict, None]:
+    """Total revenue, distinct orders and distinct customers for the filters."""
+    df = run_query(
+        "SELECT SUM({revenue}) AS Revenue, COUNT(DISTINCT o.OrderID) AS Orders,"
+        " COUNT(DISTINCT o.CustomerID) AS Customers {sales_from}{where}",
+        filters
+    )
+    if df is None:
+        return None
+    kpis = df.iloc[0]
+    return {"Revenue": float(kpis['Revenue']) if pd.notna(kpis['Revenue']) else 0.0, "Orders": int(kpis['Orders']), "Customers": int(kpis['Customers'])}
+
+@profiled_cache(st.cache_data(ttl=Config.DIRECT_QUERY_TTL_SECONDS))
+def query_revenue_trend(filters: dict) -> Union[pd.DataFrame, None]:
+    """Revenue and distinct orders per day, sorted by date.
+
+    Daily totals are small enough to resample to weeks, months or quarters
+    on the client for sparklines, trends and period comparisons.
+    """
+    df = run_query(
+        "SELECT {order_day} AS OrderDate, SUM({revenue}) AS Revenue, COUNT(DISTINCT o.OrderID) AS Orders"
+        " {sales_from}{where} GROUP BY {order_day} ORDER BY {order_day}",
+        filters
+    )
+    if df is not None:
+        df['OrderDate'] = pd.to_datetime(df['OrderDate'])
+    return df
+
+@profiled_cache(st.cache_data(ttl=Config.DIRECT_QUERY_TTL_SECONDS))
+def query_product_performance(filters: dict) -> Union[pd.DataFrame, None]:
+    """Revenue and quantity per product."""
+    return run_query(
+        "SELECT od.ProductID, p.ProductName, c.CategoryName, SUM({revenue}) AS Revenue, SUM(od.Quantity) AS Quantity"
+        " {sales_from}{where} GROUP BY od.ProductID, p.ProductName, c.CategoryName",
+        filters
+    )
+
+@profiled_cache(st.cache_data(ttl=Config.DIRECT_QUERY_TTL_SECONDS))
+def query_employee_leaderboard(filters: dict) -> Union[pd.DataFrame, None]:
+    """Revenue and distinct orders per employee."""
+    return run_query(
+        "SELECT {employee_name} AS EmployeeName, SUM({revenue}) AS Revenue, COUNT(DISTINCT o.OrderID) AS Orders"
+        " {sales_from}{where} GROUP BY {employee_name}",
+        filters
+    )
+
+@profiled_cache(st.cache_data(ttl=Config.DIRECT_QUERY_TTL_SECONDS))
+def query_country_revenue(filters: dict) -> Union[pd.DataFrame, None]:
+    """Revenue per customer country, with ISO3 codes for maps."""
+    df = run_query(
+        "SELECT cu.Country, SUM({revenue}) AS Revenue {sales_from}{where} GROUP BY cu.Country",
+        filters
+    )
+    if df is not None:
+        df.insert(1, 'CountryISO3', df['Country'].map(map_country_to_iso3))
+    return df
+
+@profiled_cache(st.cache_data(ttl=Config.DIRECT_QUERY_TTL_SECONDS))
+def query_supplier_stats(filters: dict) -> Union[pd.DataFrame, None]:
+    """Revenue, distinct orders and distinct products per supplier."""
+    return run_query(
+        "SELECT s.CompanyName AS SupplierName, SUM({revenue}) AS Revenue,"
+        " COUNT(DISTINCT o.OrderID) AS Orders, COUNT(DISTINCT od.ProductID) AS Products"
+        " {sales_from}{where} GROUP BY s.CompanyName",
+        filters
+    )
+
+@profiled_cache(st.cache_data(ttl=Config.DIRECT_QUERY_TTL_SECONDS))
+def query_shipping_histograms(filters: dict) -> Union[HistogramCube, None]:
+    """Shipping-day histograms of the shipped orders matching the filters.
+
+    The database counts orders per country, employee, shipper and shipping
+    day; those counts become a HistogramCube like the in-memory one, minus the
+    order-month dimension (the date filter is already applied in SQL).
+    """
+    df = run_query(
+        "SELECT Country, EmployeeName, ShipperName, ShippingDays, COUNT(*) AS Orders FROM ("
+        " SELECT DISTINCT o.OrderID, cu.Country, {employee_name} AS EmployeeName,"
+        " sh.CompanyName AS ShipperName, {shipping_days} AS ShippingDays {sales_from}{where}"
+        ") shipped GROUP BY Country, EmployeeName, ShipperName, ShippingDays",
+        filters, conditions=("o.ShippedDate IS NOT NULL",)
+    )
+    if df is None:
+        return None
+
+    df.insert(0, 'Region', df['Country'].map(map_country_to_region))
+    return HistogramCube.build(
+        df, 'ShippingDays', ['Region', 'Country', 'EmployeeName', 'ShipperName'],
+        max_value=Config.SHIPPING_HISTOGRAM_MAX_DAYS, weight_col='Orders'
+    )
@@ -27,12 +27,13 @@ def get_db_engine(connection_string: str):
         logging.error(f"Error creating database engine: {e}")
         return None
 
-def extract_data(engine, query: str) -> Union[pd.DataFrame, None]:
+def extract_data(engine, query: str, params: dict = None) -> Union[pd.DataFrame, None]:
     """Extracts data from the database using a SQL query.
 
     Args:
         engine (sqlalchemy.engine.Engine): The SQLAlchemy engine.
         query (str): The SQL query to execute.
+        params (dict, optional): Values for the query's :name parameters.
 
     Returns:
         pd.DataFrame: A DataFrame containing the query results, or None on error.
@@ -43,7 +44,7 @@ def extract_data(engine, query: str) -> Union[pd.DataFrame, None]:
 
     try:
         with engine.connect() as connection:
-            df = pd.read_sql_query(text(query), connection)
+            df = pd.read_sql_query(text(query), connection, params=params)
             logging.info(f"Successfully extracted {len(df)} rows.")
             return df
     except SQLAlchemyError as e:
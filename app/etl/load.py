@@ -2,11 +2,17 @@
 Load module for the ETL pipeline.
 
 In this project, 'load' simply means returning the transformed data
-to the Streamlit application for display.
+to the Streamlit application for display, optionally persisting it as a
+month-partitioned on-disk snapshot so new processes can start without the
+database and refreshes only rewrite the latest month.
 """
 
 import logging
+import os
+import shutil
+import time
 import pandas as pd
+from typing import Union
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -25,4 +31,147 @@ def load_data(df: pd.DataFrame, description: str) -> pd.DataFrame:
         return pd.DataFrame() # Return empty DataFrame on error
 
     logging.info(f"Successfully loaded {description} with {len(df)} rows.")
-    return df
\ No newline at end of file
+    return df
+
+
+# --- Month-Partitioned Snapshot ---
+# <snapshot_dir>/sales_data/OrderMonth=YYYY-MM/part-0.parquet   one partition per order month
+# <snapshot_dir>/customer_attributes.parquet                    CUSTOMER_COLUMNS per CustomerID
+# <snapshot_dir>/_SUCCESS                                       written last; its mtime is the snapshot age
+# <snapshot_dir>/_FULL_BUILD                                    its mtime is the age of the last full rewrite
+SNAPSHOT_DATASET = "sales_data"
+CUSTOMER_ATTRIBUTES_FILENAME = "customer_attributes.parquet"
+SUCCESS_MARKER = "_SUCCESS"
+FULL_BUILD_MARKER = "_FULL_BUILD"
+PARTITION_PREFIX = "OrderMonth="
+
+# Customer-level attributes that are recomputed over the full history on every
+# refresh (the RFM segment). They are stored once per customer, so a refresh
+# does not have to rewrite the closed month partitions they would repeat in.
+CUSTOMER_COLUMNS = ['Segment']
+
+def _write_parquet(df: pd.DataFrame, path: str):
+    """Writes a Parquet file atomically so readers never see a partial file."""
+    tmp_path = f"{path}.tmp"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+def save_snapshot(df: pd.DataFrame, snapshot_dir: str, since: Union[pd.Timestamp, None] = None) -> bool:
+    """Persists the transformed data as a Parquet dataset partitioned by order month.
+
+    Args:
+        df (pd.DataFrame): The transformed DataFrame, with an OrderDate column.
+        snapshot_dir (str): Directory for the snapshot; empty disables snapshots.
+        since (pd.Timestamp, optional): Only rewrite the partitions from this
+            month on (an incremental refresh). By default every partition is
+            written. Either way, partitions of the rewritten months that are
+            no longer in the data are removed.
+
+    Returns:
+        bool: True if the snapshot was written.
+    """
+    if not snapshot_dir:
+        return False
+
+    try:
+        dataset_dir = os.path.join(snapshot_dir, SNAPSHOT_DATASET)
+        os.makedirs(dataset_dir, exist_ok=True)
+
+        customer_columns = [col for col in CUSTOMER_COLUMNS if col in df.columns]
+        if customer_columns:
+            customers = df[['CustomerID'] + customer_columns].drop_duplicates('CustomerID')
+            _write_parquet(customers, os.path.join(snapshot_dir, CUSTOMER_ATTRIBUTES_FILENAME))
+            df = df.drop(columns=customer_columns)
+        elif os.path.exists(os.path.join(snapshot_dir, CUSTOMER_ATTRIBUTES_FILENAME)):
+            os.remove(os.path.join(snapshot_dir, CUSTOMER_ATTRIBUTES_FILENAME))
+
+        months = df['OrderDate'].dt.to_period('M')
+        first_month = pd.Period(since, freq='M') if since is not None else None
+        written = set()
+        for month, partition in df.groupby(months, sort=True):
+            written.add(f"{PARTITION_PREFIX}{month}")
+            if first_month is not None and month < first_month:
+                continue
+            partition_dir = os.path.join(dataset_dir, f"{PARTITION_PREFIX}{month}")
+            os.makedirs(partition_dir, exist_ok=True)
+            _write_parquet(partition, os.path.join(partition_dir, "part-0.parquet"))
+
+        # Remove the partitions of months no longer in the data (from first_month on, if incremental)
+        for name in set(os.listdir(dataset_dir)) - written:
+            if first_month is not None and not (
+                name.startswith(PARTITION_PREFIX) and pd.Period(name[len(PARTITION_PREFIX):], freq='M') >= first_month
+            ):
+                continue
+            shutil.rmtree(os.path.join(dataset_dir, name), ignore_errors=True)
+
+        markers = [SUCCESS_MARKER] if first_month is not None else [FULL_BUILD_MARKER, SUCCESS_MARKER]
+        for marker in markers:
+            with open(os.path.join(snapshot_dir, marker), "w"):
+                pass
+        scope = f"partitions from {first_month}" if first_month is not None else f"{len(written)} partitions"
+        logging.info(f"Saved snapshot with {len(df)} rows ({scope}) to {dataset_dir}.")
+        return True
+    except (OSError, ImportError, ValueError) as e:
+        logging.error(f"Error saving snapshot: {e}")
+        return False
+
+def snapshot_age(snapshot_dir: str, marker: str = SUCCESS_MARKER) -> Union[float, None]:
+    """Returns the age of the snapshot in seconds, or None if there is none.
+
+    Pass FULL_BUILD_MARKER to get the time since every partition was last rewritten.
+    """
+    if not snapshot_dir:
+        return None
+    try:
+        return time.time() - os.path.getmtime(os.path.join(snapshot_dir, marker))
+    except OSError:
+        return None
+
+def load_snapshot(snapshot_dir: str, max_age_seconds: Union[int, None]) -> Union[pd.DataFrame, None]:
+    """Reads the persisted data if a snapshot exists and is fresh enough.
+
+    Partitions are read in month order, so the result is sorted by OrderDate
+    (see select_date_range).
+
+    Args:
+        snapshot_dir (str): Directory of the snapshot; empty disables snapshots.
+        max_age_seconds (int | None): Snapshots older than this are ignored;
+            None accepts any age (e.g. as the base of an incremental refresh).
+
+    Returns:
+        pd.DataFrame | None: The snapshot, or None if unavailable or stale.
+    """
+    age = snapshot_age(snapshot_dir)
+    if age is None:
+        return None
+    if max_age_seconds is not None and age > max_age_seconds:
+        logging.info(f"Snapshot at {snapshot_dir} is stale ({age:.0f}s old).")
+        return None
+
+    try:
+        dataset_dir = os.path.join(snapshot_dir, SNAPSHOT_DATASET)
+        partitions = sorted(name for name in os.listdir(dataset_dir) if name.startswith(PARTITION_PREFIX))
+        df = pd.concat(
+            [pd.read_parquet(os.path.join(dataset_dir, name, "part-0.parquet")) for name in partitions],
+            ignore_index=True
+        )
+        customers_path = os.path.join(snapshot_dir, CUSTOMER_ATTRIBUTES_FILENAME)
+        if os.path.exists(customers_path):
+            df = pd.merge(df, pd.read_parquet(customers_path), on='CustomerID', how='left')
+        logging.info(f"Loaded snapshot with {len(df)} rows from {len(partitions)} partitions in {dataset_dir}.")
+        return df
+    except (OSError, ImportError, ValueError) as e:
+        logging.error(f"Error loading snapshot: {e}")
+        return None
+
+def select_date_range(df: pd.DataFrame, start_date, end_date) -> pd.DataFrame:
+    """Returns the rows with an OrderDate within [start_date, end_date] (whole days).
+
+    The data must be sorted by OrderDate, which lays each order month out as
+    one contiguous partition. The range is found by binary search, so a
+    quarter selection touches only its three months instead of every row.
+    """
+    order_dates = df['OrderDate']
+    start = order_dates.searchsorted(pd.Timestamp(start_date), side='left')
+    stop = order_dates.searchsorted(pd.Timestamp(end_date) + pd.Timedelta(days=1), side='left')
+    return df.iloc[start:stop]
@@ -0,0 +1,147 @@
+"""
+Builds a SQLite copy of the Northwind database from docs/instnwnd.sql.
+
+The T-SQL install script cannot be executed by SQLite directly, so this module
+parses the CREATE TABLE and INSERT statements of the tables the dashboard uses
+and loads them into a SQLite file with equivalent column types. Dates are
+stored as ISO-8601 text, which SQLite's date functions understand.
+
+Usage:
+    python -m app.etl.northwind_sqlite northwind.db
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import sys
+from datetime import datetime
+from typing import List, Tuple
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+DEFAULT_SQL_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "docs", "instnwnd.sql"
+)
+
+TABLES = [
+    "Categories", "Customers", "Employees", "Shippers",
+    "Suppliers", "Orders", "Products", "Order Details",
+]
+
+_SQLITE_TYPES = {
+    "int": "INTEGER", "smallint": "INTEGER", "bit": "INTEGER",
+    "money": "REAL", "real": "REAL",
+    "datetime": "TEXT", "nvarchar": "TEXT", "nchar": "TEXT", "ntext": "TEXT",
+    "image": "BLOB",
+}
+
+_CREATE_TABLE = re.compile(r'^CREATE TABLE "([^"]+)" \((.*?)^\)\s*$', re.M | re.S)
+_COLUMN = re.compile(r'^\s*"([^"]+)"\s+"?(\w+)"?', re.M)
+_INSERT = re.compile(r'INSERT\s+(?:INTO\s+)?"([^"]+)"\s*(\([^)]*\))?\s*VALUES\s*\(', re.I)
+
+def _parse_schema(script: str) -> dict:
+    """Returns {table: [(column, T-SQL type), ...]} for the dashboard tables."""
+    schema = {}
+    for table, body in _CREATE_TABLE.findall(script):
+        if table in TABLES:
+            columns = []
+            for line in body.splitlines():
+                if line.strip().startswith("CONSTRAINT"):
+                    break
+                match = _COLUMN.match(line)
+                if match:
+                    columns.append((match.group(1), match.group(2).lower()))
+            schema[table] = columns
+    return schema
+
+def _parse_values(script: str, pos: int) -> Tuple[List[str], int]:
+    """Tokenizes a VALUES ( ... ) list starting just after the opening parenthesis.
+
+    Returns the raw literal tokens and the position after the closing parenthesis.
+    """
+    tokens, current, i = [], "", pos
+    while i < len(script):
+        char = script[i]
+        if char == "'":
+            # Quoted string; '' is an escaped quote
+            end = i + 1
+            while True:
+                end = script.index("'", end)
+                if script[end + 1:end + 2] == "'":
+                    end += 2
+                    continue
+                break
+            current += script[i:end + 1]
+            i = end + 1
+            continue
+        if char in ",)":
+            tokens.append(current.strip())
+            current = ""
+            if char == ")":
+                return tokens, i + 1
+        else:
+            current += char
+        i += 1
+    raise ValueError("Unterminated VALUES list.")
+
+def _convert(token: str, sql_type: str):
+    """Converts a T-SQL literal to a Python value for the given column type."""
+    if token.upper() == "NULL":
+        return None
+    if token.startswith("N'"):
+        token = token[1:]
+    if token.startswith("'"):
+        text = token[1:-1].replace("''", "'")
+        if sql_type == "datetime":
+            return datetime.strptime(text, "%m/%d/%Y").strftime("%Y-%m-%d %H:%M:%S")
+        return text
+    if token.lower().startswith("0x"):
+        return bytes.fromhex(token[2:]) if sql_type == "image" else int(token, 16)
+    if sql_type in ("int", "smallint", "bit"):
+        return int(token)
+    return float(token)
+
+def create_northwind_sqlite(db_path: str, sql_path: str = DEFAULT_SQL_PATH) -> str:
+    """Creates (or replaces) a SQLite Northwind database from the install script.
+
+    Args:
+        db_path (str): Path of the SQLite file to create.
+        sql_path (str): Path of instnwnd.sql.
+
+    Returns:
+        str: A SQLAlchemy connection string for the new database.
+    """
+    with open(sql_path, encoding="utf-8", errors="replace") as f:
+        script = f.read()
+    schema = _parse_schema(script)
+
+    rows = {table: [] for table in schema}
+    for match in _INSERT.finditer(script):
+        table, column_list = match.group(1), match.group(2)
+        if table not in schema:
+            continue
+        types = dict(schema[table])
+        columns = re.findall(r'"([^"]+)"', column_list) if column_list else [col for col, _ in schema[table]]
+        tokens, _ = _parse_values(script, match.end())
+        values = dict(zip(columns, (_convert(token, types[col]) for col, token in zip(columns, tokens))))
+        rows[table].append(tuple(values.get(col) for col, _ in schema[table]))
+
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    with sqlite3.connect(db_path) as connection:
+        for table in TABLES:
+            columns = schema[table]
+            column_sql = ", ".join(f'"{col}" {_SQLITE_TYPES.get(sql_type, "TEXT")}' for col, sql_type in columns)
+            connection.execute(f'CREATE TABLE "{table}" ({column_sql})')
+            placeholders = ", ".join("?" for _ in columns)
+            connection.executemany(f'INSERT INTO "{table}" VALUES ({placeholders})', rows[table])
+            logging.info(f"Loaded {len(rows[table])} rows into {table}.")
+    connection.close()
+
+    return f"sqlite:///{os.path.abspath(db_path)}"
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python -m app.etl.northwind_sqlite <output.db>")
+    print(create_northwind_sqlite(sys.argv[1]))
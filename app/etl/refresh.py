@@ -0,0 +1,128 @@
+"""
+Per-table refresh policies for the extract step.
+
+Each source table has a refresh policy: a TTL and a change-detection probe.
+Extracted tables are kept in a process-wide store. Until its TTL expires a
+table is reused without touching the database; after that a cheap probe
+query (row count and checksum) decides whether the table changed, and only
+changed tables are extracted again. Facts (orders and their lines, and the
+customers placing them) are checked every few minutes, slow-moving
+dimensions once a day.
+"""
+
+import logging
+import threading
+import time
+from typing import Tuple, Union
+
+import pandas as pd
+
+from ..config import Config
+from .extract import extract_data
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+_FACTS = {"ttl_seconds": Config.FACT_REFRESH_SECONDS, "probe": "checksum"}
+_DIMENSIONS = {"ttl_seconds": Config.DIMENSION_REFRESH_SECONDS, "probe": "checksum"}
+
+# Table name -> (SQL table, refresh policy). Probes: "checksum" or None (always extract)
+TABLE_REFRESH_POLICIES = {
+    "orders": ("Orders", _FACTS),
+    "order_details": ("[Order Details]", _FACTS),
+    "customers": ("Customers", _FACTS),  # New customers arrive with their first orders
+    "products": ("Products", _DIMENSIONS),
+    "categories": ("Categories", _DIMENSIONS),
+    "employees": ("Employees", _DIMENSIONS),
+    "suppliers": ("Suppliers", _DIMENSIONS),
+    "shippers": ("Shippers", _DIMENSIONS),
+}
+
+# Probe queries per dialect. SQLite has no checksum function, so the highest
+# rowid stands in: inserts and deletes are detected, in-place updates are not.
+_PROBES = {
+    "mssql": {
+        "checksum": "SELECT COUNT_BIG(*) AS row_count, CHECKSUM_AGG(BINARY_CHECKSUM(*)) AS checksum FROM {table};",
+    },
+    "sqlite": {
+        "checksum": "SELECT COUNT(*) AS row_count, MAX(rowid) AS checksum FROM {table};",
+    },
+}
+
+_STORE = {}  # (database URL, table name) -> {"df", "signature", "checked_at", "since"}
+_STORE_LOCK = threading.Lock()
+_generation = 0
+
+def extraction_generation() -> int:
+    """A counter that increases whenever any table is extracted again."""
+    return _generation
+
+def clear_table_store():
+    """Forgets every stored table, so the next refresh extracts them all."""
+    global _generation
+    with _STORE_LOCK:
+        _STORE.clear()
+        _generation += 1
+
+def probe_table(engine, table: str, probe: str) -> Union[tuple, None]:
+    """Runs a change-detection probe against a table.
+
+    Args:
+        engine (sqlalchemy.engine.Engine): The SQLAlchemy engine.
+        table (str): The SQL table name.
+        probe (str): A probe name, e.g. "checksum".
+
+    Returns:
+        tuple | None: The table's signature, or None if the probe is not
+        supported by the dialect or failed.
+    """
+    query = _PROBES.get(engine.dialect.name, {}).get(probe)
+    if query is None:
+        return None
+    result = extract_data(engine, query.format(table=table))
+    if result is None or result.empty:
+        return None
+    return tuple(result.iloc[0].fillna(-1).tolist())  # An empty table has no checksum
+
+def refresh_table(engine, name: str, query: str, params: dict = None,
+                  since: pd.Timestamp = None) -> Tuple[Union[pd.DataFrame, None], str]:
+    """Returns a table, extracting it again only when its policy requires it.
+
+    Args:
+        engine (sqlalchemy.engine.Engine): The SQLAlchemy engine.
+        name (str): A key of TABLE_REFRESH_POLICIES.
+        query (str): The extraction query.
+        params (dict, optional): Values for the query's :name parameters.
+        since (pd.Timestamp, optional): The incremental cutoff the query
+            applies; a stored table is only reused for the same cutoff.
+
+    Returns:
+        Tuple[pd.DataFrame | None, str]: A copy of the table (None if the
+        extraction failed) and how it was obtained: "cached" (within its
+        TTL), "unchanged" (probe matched) or "extracted".
+    """
+    global _generation
+    table, policy = TABLE_REFRESH_POLICIES[name]
+    key = (str(engine.url), name)
+    now = time.time()
+    with _STORE_LOCK:
+        entry = _STORE.get(key)
+    if entry is not None and entry["since"] != since:
+        entry = None
+
+    if entry is not None and now - entry["checked_at"] < policy["ttl_seconds"]:
+        return entry["df"].copy(), "cached"
+
+    # The probe runs before the extraction, so a change in between is caught by the next probe
+    signature = probe_table(engine, table, policy["probe"]) if policy["probe"] else None
+    if entry is not None and signature is not None and signature == entry["signature"]:
+        with _STORE_LOCK:
+            entry["checked_at"] = now
+        return entry["df"].copy(), "unchanged"
+
+    df = extract_data(engine, query, params)
+    if df is None:
+        return None, "extracted"
+    with _STORE_LOCK:
+        _STORE[key] = {"df": df, "signature": signature, "checked_at": now, "since": since}
+        _generation += 1
+    return df.copy(), "extracted"
@@ -0,0 +1,115 @@
+"""
+Synthetic data module to generate Northwind-shaped source tables.
+
+Used for load testing and benchmarks, where a database is not available and
+the data volume must be configurable. The tables have the same columns the
+extract step returns, so they flow through the regular transform step.
+"""
+
+import numpy as np
+import pandas as pd
+
+CATEGORY_NAMES = [
+    'Beverages', 'Condiments', 'Confections', 'Dairy Products',
+    'Grains/Cereals', 'Meat/Poultry', 'Produce', 'Seafood'
+]
+SHIPPER_NAMES = ['Speedy Express', 'United Package', 'Federal Shipping']
+COUNTRIES = [
+    'Argentina', 'Austria', 'Belgium', 'Brazil', 'Canada', 'Denmark', 'Finland',
+    'France', 'Germany', 'Ireland', 'Italy', 'Mexico', 'Norway', 'Poland',
+    'Portugal', 'Spain', 'Sweden', 'Switzerland', 'UK', 'USA', 'Venezuela'
+]
+FIRST_ORDER_DATE = pd.Timestamp('1996-07-04')
+ORDERS_PER_DAY = 1.24  # Roughly the density of the original Northwind history
+MAX_HISTORY_DAYS = 3650
+
+def generate_northwind_tables(n_orders: int = 830, seed: int = 0) -> dict:
+    """Generates the eight Northwind source tables with n_orders orders.
+
+    Dimension sizes grow with the number of orders (at least the original
+    Northwind sizes), and the order history spans up to ten years.
+
+    Args:
+        n_orders (int): Number of orders to generate.
+        seed (int): Seed for the random generator, for reproducible data.
+
+    Returns:
+        dict: DataFrames keyed by the same names the extract step uses.
+    """
+    rng = np.random.default_rng(seed)
+    n_customers = max(91, n_orders // 10)
+    n_products = max(77, n_orders // 100)
+    n_suppliers = max(29, n_products // 3)
+    n_employees = max(9, n_orders // 1000)
+
+    customers = pd.DataFrame({
+        'CustomerID': [f"C{i:06d}" for i in range(n_customers)],
+        'CompanyName': [f"Customer {i}" for i in range(n_customers)],
+        'ContactName': [f"Contact {i}" for i in range(n_customers)],
+        'Country': rng.choice(COUNTRIES, n_customers),
+    })
+    employees = pd.DataFrame({
+        'EmployeeID': np.arange(1, n_employees + 1),
+        'FirstName': [f"Employee{i}" for i in range(1, n_employees + 1)],
+        'LastName': [f"Lastname{i}" for i in range(1, n_employees + 1)],
+    })
+    categories = pd.DataFrame({
+        'CategoryID': np.arange(1, len(CATEGORY_NAMES) + 1),
+        'CategoryName': CATEGORY_NAMES,
+    })
+    suppliers = pd.DataFrame({
+        'SupplierID': np.arange(1, n_suppliers + 1),
+        'CompanyName': [f"Supplier {i:04d}" for i in range(1, n_suppliers + 1)],
+    })
+    shippers = pd.DataFrame({
+        'ShipperID': np.arange(1, len(SHIPPER_NAMES) + 1),
+        'CompanyName': SHIPPER_NAMES,
+    })
+    products = pd.DataFrame({
+        'ProductID': np.arange(1, n_products + 1),
+        'ProductName': [f"Product {i:05d}" for i in range(1, n_products + 1)],
+        'SupplierID': rng.integers(1, n_suppliers + 1, n_products),
+        'CategoryID': rng.integers(1, len(CATEGORY_NAMES) + 1, n_products),
+        'UnitPrice': rng.uniform(2.5, 120.0, n_products).round(2),
+    })
+
+    # --- Orders: spread over the history, most shipped within a few weeks ---
+    history_days = int(min(max(n_orders / ORDERS_PER_DAY, 670), MAX_HISTORY_DAYS))
+    order_dates = FIRST_ORDER_DATE + pd.to_timedelta(np.sort(rng.integers(0, history_days, n_orders)), unit='D')
+    shipping_days = np.minimum(rng.gamma(2.0, 4.5, n_orders).round(), 60)
+    shipped_dates = pd.Series(order_dates + pd.to_timedelta(shipping_days, unit='D'))
+    shipped_dates[rng.random(n_orders) < 0.03] = pd.NaT  # A few orders are not shipped yet
+    orders = pd.DataFrame({
+        'OrderID': np.arange(10248, 10248 + n_orders),
+        'CustomerID': customers['CustomerID'].to_numpy()[rng.integers(0, n_customers, n_orders)],
+        'EmployeeID': rng.integers(1, n_employees + 1, n_orders),
+        'OrderDate': order_dates,
+        'RequiredDate': order_dates + pd.Timedelta(days=28),
+        'ShippedDate': shipped_dates.to_numpy(),
+        'ShipVia': rng.integers(1, len(SHIPPER_NAMES) + 1, n_orders),
+    })
+
+    # --- Order lines: 1-6 distinct products per order ---
+    lines_per_order = rng.integers(1, 7, n_orders)
+    n_lines = int(lines_per_order.sum())
+    line_number = np.arange(n_lines) - np.repeat(np.cumsum(lines_per_order) - lines_per_order, lines_per_order)
+    first_product = np.repeat(rng.integers(0, n_products, n_orders), lines_per_order)
+    product_ids = (first_product + line_number) % n_products + 1
+    order_details = pd.DataFrame({
+        'OrderID': np.repeat(orders['OrderID'].to_numpy(), lines_per_order),
+        'ProductID': product_ids,
+        'UnitPrice': products['UnitPrice'].to_numpy()[product_ids - 1],
+        'Quantity': rng.integers(1, 80, n_lines),
+        'Discount': rng.choice([0.0, 0.0, 0.0, 0.05, 0.1, 0.15, 0.2, 0.25], n_lines),
+    })
+
+    return {
+        "customers": customers,
+        "orders": orders,
+        "order_details": order_details,
+        "products": products,
+        "categories": categories,
+        "employees": employees,
+        "suppliers": suppliers,
+        "shippers": shippers,
+    }
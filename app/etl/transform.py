@@ -3,6 +3,8 @@ Transform module for creating a comprehensive, analysis-ready sales dataset.
 """
 
 import pandas as pd
+from typing import Optional
+from ..aggregation import aggregate
 from .utils import map_country_to_region, map_country_to_iso3
 
 def create_comprehensive_sales_data(
@@ -12,12 +14,14 @@ def create_comprehensive_sales_data(
     categories: pd.DataFrame,
     employees: pd.DataFrame,
     customers: pd.DataFrame,
-    suppliers: pd.DataFrame
+    suppliers: pd.DataFrame,
+    shippers: Optional[pd.DataFrame] = None
 ) -> pd.DataFrame:
     """Merges and transforms raw data tables into a single, rich sales overview DataFrame.
 
     This function calculates revenue, joins product and category information, and adds
-    details about the customer and the sales employee responsible for the order.
+    details about the customer, the sales employee responsible for the order and,
+    when the Shippers table is provided, the shipping company.
 
     Returns:
         pd.DataFrame: A comprehensive DataFrame ready for analytics.
@@ -39,6 +43,11 @@ def create_comprehensive_sales_data(
     sales_data = pd.merge(sales_data, orders, on='OrderID', how='left')
     sales_data = pd.merge(sales_data, customers_info, on='CustomerID', how='left')
     sales_data = pd.merge(sales_data, employees_info, on='EmployeeID', how='left')
+    if shippers is not None:
+        shippers_info = shippers[['ShipperID', 'CompanyName']].rename(columns={'ShipperID': 'ShipVia', 'CompanyName': 'ShipperName'})
+        sales_data = pd.merge(sales_data, shippers_info, on='ShipVia', how='left')
+    else:
+        sales_data['ShipperName'] = None
 
     # --- Convert date columns to datetime ---
     sales_data['OrderDate'] = pd.to_datetime(sales_data['OrderDate'])
@@ -50,7 +59,7 @@ def create_comprehensive_sales_data(
 
     # --- Select and order final columns ---
     final_columns = [
-        'OrderID', 'OrderDate', 'ShippedDate', 'CustomerID', 'ContactName',
+        'OrderID', 'OrderDate', 'ShippedDate', 'ShipperName', 'CustomerID', 'ContactName',
         'Region', 'Country', 'CountryISO3',
         'EmployeeID', 'EmployeeName', 'ProductID', 'ProductName',
         'CategoryID', 'CategoryName', 'SupplierID', 'SupplierName',
@@ -59,6 +68,37 @@ def create_comprehensive_sales_data(
     
     return sales_data[final_columns]
 
+def create_order_facts(sales_data: pd.DataFrame) -> pd.DataFrame:
+    """Collapses line-item sales data into an order-grain fact table.
+
+    Each order appears exactly once, so order counts are plain row counts and
+    order-level measures such as shipping time are not weighted by line count.
+
+    Args:
+        sales_data (pd.DataFrame): The comprehensive (line-item) sales data.
+
+    Returns:
+        pd.DataFrame: One row per OrderID with order revenue, line count, dates,
+        shipping days and the customer, employee and country dimensions.
+    """
+    # --- Order attributes are repeated on every line, so take the first ---
+    attribute_columns = [
+        col for col in [
+            'OrderDate', 'ShippedDate', 'CustomerID', 'ContactName', 'Region', 'Country',
+            'CountryISO3', 'EmployeeID', 'EmployeeName', 'ShipperName', 'Segment'
+        ] if col in sales_data.columns
+    ]
+    aggregations = {col: (col, 'first') for col in attribute_columns}
+    aggregations['Revenue'] = ('Revenue', 'sum')
+    aggregations['LineCount'] = ('OrderID', 'size')
+
+    order_facts = sales_data.groupby('OrderID', sort=False).agg(**aggregations).reset_index()
+
+    # --- Shipping time in whole days (NaN for orders not yet shipped) ---
+    order_facts['ShippingDays'] = (order_facts['ShippedDate'] - order_facts['OrderDate']).dt.days
+
+    return order_facts
+
 def perform_rfm_analysis(sales_data: pd.DataFrame) -> pd.DataFrame:
     """Performs RFM analysis to segment customers.
 
@@ -72,14 +112,14 @@ def perform_rfm_analysis(sales_data: pd.DataFrame) -> pd.DataFrame:
     sales_data['OrderDate'] = pd.to_datetime(sales_data['OrderDate'])
     snapshot_date = sales_data['OrderDate'].max() + pd.DateOffset(days=1)
 
-    # --- Calculate RFM metrics ---
-    rfm = sales_data.groupby('CustomerID').agg({
-        'OrderDate': lambda date: (snapshot_date - date.max()).days, # Recency
-        'OrderID': 'nunique', # Frequency
-        'Revenue': 'sum' # Monetary
-    })
+    # --- Calculate RFM metrics (sharded by customer across the aggregation workers) ---
+    rfm = aggregate(sales_data, 'CustomerID', {
+        'LastOrder': ('OrderDate', 'max'),
+        'Frequency': ('OrderID', 'nunique'),
+        'MonetaryValue': ('Revenue', 'sum')
+    }, shard_key='CustomerID').set_index('CustomerID')
 
-    rfm.rename(columns={'OrderDate': 'Recency', 'OrderID': 'Frequency', 'Revenue': 'MonetaryValue'}, inplace=True)
+    rfm['Recency'] = (snapshot_date - rfm['LastOrder']).dt.days
 
     # --- Assign RFM scores ---
     rfm['R_Score'] = pd.qcut(rfm['Recency'], 4, labels=[4, 3, 2, 1]) # Higher score is better (more recent)
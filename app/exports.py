@@ -0,0 +1,140 @@
+"""
+Export module to serialize DataFrames for download.
+
+Exports are produced on demand in fixed-size row chunks, so a large frame is
+never rendered as one giant intermediate string (e.g. a full to_csv). The
+finished file is still held in memory as a whole, because st.download_button
+serves its payload from memory. Finished files are cached per data
+fingerprint so repeated downloads of the same slice are free; the cache is
+bounded by total size (Config.EXPORT_CACHE_MAX_MB), evicting the least
+recently used files first, and files larger than the bound are not cached.
+"""
+
+import hashlib
+import io
+import logging
+import threading
+from collections import OrderedDict
+import pandas as pd
+from app.config import Config
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+EXPORT_FORMATS = {
+    "csv": {"label": "CSV", "extension": "csv", "mime": "text/csv"},
+    "parquet": {"label": "Parquet", "extension": "parquet", "mime": "application/vnd.apache.parquet"},
+    "arrow": {"label": "Arrow IPC", "extension": "arrow", "mime": "application/vnd.apache.arrow.stream"},
+}
+
+def dataframe_fingerprint(df: pd.DataFrame) -> str:
+    """Computes a stable content hash for a DataFrame.
+
+    The hash covers column names, dtypes and row values, but not the index,
+    which is never written to an export.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to fingerprint.
+
+    Returns:
+        str: A hex digest identifying the DataFrame's content.
+    """
+    digest = hashlib.sha1()
+    digest.update(repr([(str(col), str(dtype)) for col, dtype in df.dtypes.items()]).encode('utf-8'))
+    if not df.empty:
+        digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def _iter_chunks(df: pd.DataFrame, chunk_size: int):
+    """Yields consecutive row slices of at most chunk_size rows."""
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+def _write_csv(df: pd.DataFrame, buffer: io.BytesIO, chunk_size: int):
+    """Writes a DataFrame as UTF-8 CSV, one chunk of rows at a time."""
+    text_buffer = io.TextIOWrapper(buffer, encoding='utf-8', newline='')
+    df.head(0).to_csv(text_buffer, index=False)
+    for chunk in _iter_chunks(df, chunk_size):
+        chunk.to_csv(text_buffer, index=False, header=False)
+    text_buffer.flush()
+    text_buffer.detach()
+
+def _write_parquet(df: pd.DataFrame, buffer: io.BytesIO, chunk_size: int):
+    """Writes a DataFrame as Parquet, one row group per chunk."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(buffer, schema) as writer:
+        for chunk in _iter_chunks(df, chunk_size):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+def _write_arrow(df: pd.DataFrame, buffer: io.BytesIO, chunk_size: int):
+    """Writes a DataFrame as an Arrow IPC stream, one record batch per chunk."""
+    import pyarrow as pa
+
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pa.ipc.new_stream(buffer, schema) as writer:
+        for chunk in _iter_chunks(df, chunk_size):
+            writer.write_batch(pa.RecordBatch.from_pandas(chunk, schema=schema, preserve_index=False))
+
+_WRITERS = {
+    "csv": _write_csv,
+    "parquet": _write_parquet,
+    "arrow": _write_arrow,
+}
+
+def serialize_dataframe(df: pd.DataFrame, fmt: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> bytes:
+    """Serializes a DataFrame to CSV, Parquet or Arrow IPC bytes.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to serialize.
+        fmt (str): One of the keys of EXPORT_FORMATS.
+        chunk_size (int): Number of rows written per chunk.
+
+    Returns:
+        bytes: The serialized file contents.
+    """
+    if fmt not in _WRITERS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+
+    buffer = io.BytesIO()
+    _WRITERS[fmt](df.reset_index(drop=True), buffer, chunk_size)
+    logging.info(f"Serialized {len(df)} rows to {fmt} ({buffer.tell()} bytes).")
+    return buffer.getvalue()
+
+# Finished exports, least recently used first: (fingerprint, format) -> bytes
+_EXPORT_CACHE = OrderedDict()
+_EXPORT_CACHE_LOCK = threading.Lock()
+
+def _cache_export(key: tuple, data: bytes, max_bytes: int):
+    """Stores a finished export, evicting the least recently used ones beyond max_bytes."""
+    if len(data) > max_bytes:
+        return
+    with _EXPORT_CACHE_LOCK:
+        _EXPORT_CACHE[key] = data
+        _EXPORT_CACHE.move_to_end(key)
+        while sum(len(cached) for cached in _EXPORT_CACHE.values()) > max_bytes:
+            _EXPORT_CACHE.popitem(last=False)
+
+def export_dataframe(df: pd.DataFrame, fmt: str) -> bytes:
+    """Returns the serialized export of a DataFrame, reusing cached results.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to export.
+        fmt (str): One of the keys of EXPORT_FORMATS.
+
+    Returns:
+        bytes: The serialized file contents.
+    """
+    key = (dataframe_fingerprint(df), fmt)
+    with _EXPORT_CACHE_LOCK:
+        data = _EXPORT_CACHE.get(key)
+        if data is not None:
+            _EXPORT_CACHE.move_to_end(key)
+            return data
+
+    data = serialize_dataframe(df, fmt)
+    _cache_export(key, data, Config.EXPORT_CACHE_MAX_MB * 2**20)
+    return data
@@ -0,0 +1,355 @@
+"""
+Load-testing harness for the dashboard pages.
+
+Starts one Streamlit server (`streamlit run app.py`) on synthetic data and
+drives N concurrent simulated sessions against it. Each session is a
+websocket client on its own thread that speaks the browser's protocol: it
+opens the landing page, navigates to random pages and applies random sidebar
+filter changes. All sessions share the server process, so their reruns
+contend for its GIL, its st.cache_data/st.cache_resource entries and its
+memory, as the analysts sharing one container do. The harness reports render
+latency percentiles, throughput and the server's memory growth per session,
+and fails when the p99 latency exceeds the configured budget.
+
+A render is timed from the rerun request to the server's script_finished
+message, so it covers the script run and the transfer of its output but not
+the browser's drawing.
+
+Usage:
+    python -m app.loadtest --sessions 8 --iterations 10 --orders 20000 --p99-budget-ms 2000
+"""
+
+import argparse
+import contextlib
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from websockets.sync.client import connect
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN_SCRIPT = os.path.join(ROOT_DIR, "app.py")
+MAIN_PAGE = "app"
+SERVER_START_TIMEOUT_SECONDS = 120
+RENDER_TIMEOUT_SECONDS = 300
+WIDGET_TYPES = ("selectbox", "multiselect", "button")
+
+def _free_port() -> int:
+    """Returns a TCP port on localhost that is free right now."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _rss_bytes(pid: int) -> Optional[int]:
+    """Returns the resident set size of a process, or None where /proc is unavailable."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+def _start_server(port: int, n_orders: int, log_file) -> subprocess.Popen:
+    """Starts the dashboard on synthetic data and waits until it is healthy."""
+    env = dict(os.environ, DATA_SOURCE="synthetic", SYNTHETIC_ORDERS=str(n_orders), DATA_SNAPSHOT_DIR="")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", MAIN_SCRIPT,
+         "--server.headless", "true", "--server.address", "127.0.0.1", "--server.port", str(port),
+         "--server.fileWatcherType", "none", "--browser.gatherUsageStats", "false"],
+        cwd=ROOT_DIR, env=env, stdout=log_file, stderr=subprocess.STDOUT,
+    )
+    deadline = time.time() + SERVER_START_TIMEOUT_SECONDS
+    while time.time() < deadline:
+        if server.poll() is not None:
+            break
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=5):
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    log_file.seek(0)
+    raise RuntimeError(f"Streamlit server did not start:\n{log_file.read().decode(errors='replace')[-2000:]}")
+
+def _widget_state(widget, value) -> WidgetState:
+    """Encodes a widget value the way the browser sends it back."""
+    state = WidgetState(id=widget.id)
+    if isinstance(value, bool):
+        state.trigger_value = value
+    elif isinstance(value, str):
+        state.string_value = value
+    else:
+        state.string_array_value.data[:] = value
+    return state
+
+def _current_value(widget_type: str, widget):
+    """Returns the value a selectbox or multiselect currently shows."""
+    if widget_type == "selectbox":
+        if widget.set_value:
+            return widget.raw_value
+        return widget.options[widget.default] if widget.options else None
+    return list(widget.raw_values if widget.set_value else (widget.options[i] for i in widget.default))
+
+class _Session:
+    """One simulated browser tab: a websocket connection to the server and the
+    widgets of the page it shows.
+    """
+
+    def __init__(self, port: int):
+        self._connection = contextlib.ExitStack()
+        self._ws = self._connection.enter_context(connect(
+            f"ws://127.0.0.1:{port}/_stcore/stream", subprotocols=["streamlit"],
+            max_size=None, open_timeout=RENDER_TIMEOUT_SECONDS,
+        ))
+        self.pages = {}     # page name -> page script hash, from the app's navigation
+        self.widgets = {}   # widget label -> (widget type, widget proto), for the current page
+        self._page_hash = ""
+
+    def close(self):
+        self._connection.close()
+
+    def render(self, page_hash: Optional[str] = None, widget_states=()) -> Tuple[float, Optional[str]]:
+        """Requests one rerun and reads its output.
+
+        Args:
+            page_hash (str, optional): Page to switch to; defaults to the current page.
+            widget_states (list[WidgetState]): Widget values to send with the rerun.
+
+        Returns:
+            tuple: The latency in milliseconds, and the first exception message
+            the page showed (None if it rendered cleanly).
+        """
+        if page_hash is not None:
+            self._page_hash = page_hash
+        msg = BackMsg()
+        msg.rerun_script.page_script_hash = self._page_hash
+        msg.rerun_script.widget_states.widgets.extend(widget_states)
+
+        start = time.perf_counter()
+        self._ws.send(msg.SerializeToString())
+        error = None
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(self._ws.recv(timeout=RENDER_TIMEOUT_SECONDS))
+            kind = forward.WhichOneof("type")
+            if kind == "new_session":
+                self.widgets = {}
+            elif kind == "navigation":
+                self.pages = {page.page_name: page.page_script_hash for page in forward.navigation.app_pages}
+            elif kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                element = forward.delta.new_element
+                element_type = element.WhichOneof("type")
+                if element_type in WIDGET_TYPES:
+                    widget = getattr(element, element_type)
+                    self.widgets[widget.label] = (element_type, widget)
+                elif element_type == "exception" and error is None:
+                    error = element.exception.message
+            elif kind == "script_finished":
+                if forward.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR and error is None:
+                    error = "Script failed to compile"
+                return (time.perf_counter() - start) * 1000, error
+
+    def widget_states(self, **changes) -> List[WidgetState]:
+        """Returns the current sidebar values, with the given labels changed."""
+        states = []
+        for label, (widget_type, widget) in self.widgets.items():
+            if label in changes:
+                states.append(_widget_state(widget, changes[label]))
+            elif widget_type != "button":
+                value = _current_value(widget_type, widget)
+                if value is not None:
+                    states.append(_widget_state(widget, value))
+        return states
+
+def _random_filter_change(session: _Session, rng: random.Random) -> Tuple[str, List[WidgetState]]:
+    """Picks one random sidebar interaction; returns its name and the widget values to send."""
+    action = rng.choice(["timeframe", "regions", "categories", "reset"])
+
+    if action == "timeframe":
+        _, timeframe = session.widgets.get("Select Timeframe", (None, None))
+        if timeframe is not None and timeframe.options:
+            return action, session.widget_states(**{timeframe.label: rng.choice(timeframe.options)})
+    elif action in ("regions", "categories"):
+        label = "Select Regions" if action == "regions" else "Select Product Categories"
+        _, multiselect = session.widgets.get(label, (None, None))
+        if multiselect is not None and multiselect.options:
+            k = rng.randint(1, len(multiselect.options))
+            return action, session.widget_states(**{label: rng.sample(list(multiselect.options), k)})
+
+    return "reset", session.widget_states(**{"Reset All Filters": True})
+
+def _warm_up(port: int) -> Tuple[float, List[dict], int]:
+    """Renders every page once in one session to fill the server's caches.
+
+    Returns:
+        tuple: The time the pass took in milliseconds, any errors, and the
+        number of pages the app offers besides the landing page.
+    """
+    session = _Session(port)
+    try:
+        start = time.perf_counter()
+        errors = []
+        _, error = session.render()
+        pages = {name: page_hash for name, page_hash in session.pages.items() if name != MAIN_PAGE}
+        for page, page_hash in [(MAIN_PAGE, None)] + sorted(pages.items()):
+            if page_hash is not None:
+                _, error = session.render(page_hash)
+            if error:
+                errors.append({"session": "warm-up", "page": page, "action": "navigate", "error": error})
+        return (time.perf_counter() - start) * 1000, errors, len(pages)
+    finally:
+        session.close()
+
+def _run_session(session_id: int, port: int, iterations: int, seed: int, start_barrier) -> Tuple[_Session, List[dict], float]:
+    """Drives one simulated session once all sessions are connected.
+
+    Returns:
+        tuple: The still-open session (so the server keeps its state until
+        memory is measured), one record per render, and its wall-clock start.
+    """
+    rng = random.Random(seed + session_id)
+    session = _Session(port)
+    records = []
+
+    def render(page: str, action: str, **kwargs):
+        latency_ms, error = session.render(**kwargs)
+        record = {"session": session_id, "page": page, "action": action, "latency_ms": latency_ms}
+        if error:
+            record["error"] = error
+        records.append(record)
+
+    try:
+        start_barrier.wait(timeout=RENDER_TIMEOUT_SECONDS)
+        started = time.time()
+        render(MAIN_PAGE, "open")
+        pages = sorted(name for name in session.pages if name != MAIN_PAGE)
+        for _ in range(iterations):
+            page = rng.choice(pages)
+            render(page, "navigate", page_hash=session.pages[page])
+            action, widget_states = _random_filter_change(session, rng)
+            render(page, action, widget_states=widget_states)
+    except BaseException:
+        session.close()
+        raise
+    return session, records, started
+
+def run_load_test(sessions: int, iterations: int, n_orders: int, seed: int = 0) -> dict:
+    """Runs the load test against one server process and summarizes the results.
+
+    Args:
+        sessions (int): Number of concurrent simulated sessions.
+        iterations (int): Page visits per session; each visit renders the page
+            and then applies one random filter change.
+        n_orders (int): Size of the synthetic dataset.
+        seed (int): Seed for the random interactions.
+
+    Returns:
+        dict: Latency percentiles, throughput, server memory and error details.
+    """
+    port = _free_port()
+    with tempfile.TemporaryFile() as server_log:
+        server = _start_server(port, n_orders, server_log)
+        open_sessions = []
+        try:
+            cold_pass_ms, warmup_errors, n_pages = _warm_up(port)
+            baseline_rss = _rss_bytes(server.pid)
+
+            # --- All sessions connect, then start rendering together ---
+            start_barrier = threading.Barrier(sessions)
+            with ThreadPoolExecutor(max_workers=sessions) as pool:
+                futures = [pool.submit(_run_session, i, port, iterations, seed, start_barrier)
+                           for i in range(sessions)]
+                results = [future.result() for future in futures]
+            finished = time.time()
+            open_sessions = [session for session, _, _ in results]
+            server_rss = _rss_bytes(server.pid)
+        finally:
+            for session in open_sessions:
+                session.close()
+            server.terminate()
+            try:
+                server.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                server.kill()
+    elapsed = finished - min(started for _, _, started in results)
+
+    records = [record for _, session_records, _ in results for record in session_records]
+    latencies = np.array([record["latency_ms"] for record in records])
+    errors = warmup_errors + [record for record in records if "error" in record]
+
+    per_page = {}
+    for page in sorted({record["page"] for record in records}):
+        page_latencies = [record["latency_ms"] for record in records if record["page"] == page]
+        per_page[page] = {
+            "renders": len(page_latencies),
+            "p50_ms": float(np.percentile(page_latencies, 50)),
+            "p99_ms": float(np.percentile(page_latencies, 99)),
+        }
+
+    memory_known = baseline_rss is not None and server_rss is not None
+    return {
+        "sessions": sessions,
+        "pages": n_pages,
+        "renders": len(records),
+        "cold_pass_ms": cold_pass_ms,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "max_ms": float(latencies.max()),
+        "throughput_rps": len(records) / elapsed,
+        "memory_per_session_mb": max(server_rss - baseline_rss, 0) / sessions / 2**20 if memory_known else None,
+        "server_rss_mb": server_rss / 2**20 if server_rss is not None else None,
+        "per_page": per_page,
+        "errors": errors,
+    }
+
+def print_report(report: dict, p99_budget_ms: Optional[float] = None):
+    """Prints a human-readable summary of a load-test report."""
+    print(f"Sessions: {report['sessions']} (one server)  Renders: {report['renders']}  Errors: {len(report['errors'])}")
+    print(f"Warm-up pass over the landing page and {report['pages']} pages: {report['cold_pass_ms']:,.0f} ms")
+    print(f"Latency p50: {report['p50_ms']:,.0f} ms  p99: {report['p99_ms']:,.0f} ms  max: {report['max_ms']:,.0f} ms"
+          + (f"  (p99 budget: {p99_budget_ms:,.0f} ms)" if p99_budget_ms else ""))
+    print(f"Throughput: {report['throughput_rps']:.2f} renders/s")
+    if report["memory_per_session_mb"] is not None:
+        print(f"Server memory growth per session: {report['memory_per_session_mb']:.1f} MiB  "
+              f"Server RSS: {report['server_rss_mb']:.0f} MiB")
+    print(f"\n{'p50 ms':>9} {'p99 ms':>9} {'renders':>8}  page")
+    for page, stats in report["per_page"].items():
+        print(f"{stats['p50_ms']:>9,.0f} {stats['p99_ms']:>9,.0f} {stats['renders']:>8}  {page}")
+    for error in report["errors"][:5]:
+        print(f"\nError in session {error['session']} on {error['page']} after '{error['action']}':\n{error['error']}")
+
+def main():
+    """Command-line entry point. Exits with status 1 if the run fails its budget."""
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for the dashboard pages.")
+    parser.add_argument("--sessions", type=int, default=4, help="Concurrent simulated sessions.")
+    parser.add_argument("--iterations", type=int, default=5, help="Page visits per session.")
+    parser.add_argument("--orders", type=int, default=20_000, help="Synthetic dataset size in orders.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the random interactions.")
+    parser.add_argument("--p99-budget-ms", type=float, default=None, help="Fail if p99 render latency exceeds this.")
+    args = parser.parse_args()
+
+    report = run_load_test(args.sessions, args.iterations, args.orders, args.seed)
+    print_report(report, args.p99_budget_ms)
+
+    failed = bool(report["errors"])
+    if args.p99_budget_ms is not None and report["p99_ms"] > args.p99_budget_ms:
+        print(f"\nFAILED: p99 latency {report['p99_ms']:,.0f} ms exceeds the {args.p99_budget_ms:,.0f} ms budget.")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
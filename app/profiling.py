@@ -0,0 +1,224 @@
+"""
+Per-rerun render profiler for the dashboard pages.
+
+When PROFILE_RENDERS is enabled, every page rerun records:
+  * the wall time of each section (data fetch, filtering, each aggregation
+    and each chart build), nested sections indented under their parent,
+  * hits and misses of the cached data functions, and
+  * the serialized payload size of every chart sent to the browser.
+
+The profile is shown in a collapsible developer panel at the bottom of the
+page and written as one JSON line per rerun to the log (and to
+PROFILE_LOG_PATH when set), so hot spots can be aggregated across sessions.
+With profiling disabled every hook is a cheap no-op. Fragment-only reruns
+are not profiled; fragments are timed as part of full reruns.
+
+Usage (summarize a profile log):
+    python -m app.profiling summarize render_profiles.jsonl
+"""
+
+import argparse
+import functools
+import json
+import logging
+import time
+from contextlib import contextmanager
+from typing import Callable, List, Union
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from app.config import Config
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+_SESSION_KEY = "_render_profile"
+
+class RenderProfile:
+    """The timings, cache counters and chart payloads of one page rerun."""
+
+    def __init__(self, page: str):
+        self.page = page
+        self.started = time.perf_counter()
+        self.sections = []   # (name, depth, seconds), in completion order
+        self.cache = {}      # function name -> {"hits": n, "misses": n}
+        self.charts = []     # (name, payload bytes, seconds)
+        self.depth = 0
+        self.finished = False
+
+    def to_record(self) -> dict:
+        """The profile as a JSON-serializable log record."""
+        return {
+            "event": "render_profile",
+            "page": self.page,
+            "total_s": round(time.perf_counter() - self.started, 6),
+            "sections": [{"name": name, "depth": depth, "seconds": round(seconds, 6)}
+                         for name, depth, seconds in self.sections],
+            "cache": self.cache,
+            "charts": [{"name": name, "bytes": size, "seconds": round(seconds, 6)}
+                       for name, size, seconds in self.charts],
+        }
+
+def profiling_enabled() -> bool:
+    """Whether renders are profiled (Config.PROFILE_RENDERS, inside a script run)."""
+    return Config.PROFILE_RENDERS and get_script_run_ctx() is not None
+
+def _current() -> Union[RenderProfile, None]:
+    """The profile of the running rerun, or None when not profiling."""
+    if not profiling_enabled():
+        return None
+    profile = st.session_state.get(_SESSION_KEY)
+    return profile if profile is not None and not profile.finished else None
+
+def start_render(page: str):
+    """Starts profiling a page rerun (call right after st.set_page_config)."""
+    if profiling_enabled():
+        st.session_state[_SESSION_KEY] = RenderProfile(page)
+
+@contextmanager
+def profile_section(name: str):
+    """Times a block of the current rerun as a named section."""
+    profile = _current()
+    if profile is None:
+        yield
+        return
+    profile.depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.depth -= 1
+        profile.sections.append((name, profile.depth, time.perf_counter() - start))
+
+def profiled_cache(cache_decorator: Callable) -> Callable:
+    """Wraps a Streamlit cache decorator to count hits and misses.
+
+    The cached body only runs on a miss, so it records the miss; every call
+    is counted and timed, and the difference are hits.
+
+    Args:
+        cache_decorator: e.g. st.cache_data(ttl=3600).
+
+    Returns:
+        A decorator to use in place of cache_decorator.
+    """
+    def decorator(func: Callable) -> Callable:
+        name = func.__name__
+
+        @functools.wraps(func)
+        def body(*args, **kwargs):
+            profile = _current()
+            if profile is not None:
+                profile.cache.setdefault(name, {"hits": 0, "misses": 0})["misses"] += 1
+            return func(*args, **kwargs)
+
+        cached = cache_decorator(body)
+
+        @functools.wraps(func)
+        def call(*args, **kwargs):
+            profile = _current()
+            if profile is None:
+                return cached(*args, **kwargs)
+            counts = profile.cache.setdefault(name, {"hits": 0, "misses": 0})
+            misses = counts["misses"]
+            with profile_section(f"cache: {name}"):
+                result = cached(*args, **kwargs)
+            if counts["misses"] == misses:
+                counts["hits"] += 1
+            return result
+
+        call.clear = cached.clear
+        return call
+    return decorator
+
+def plotly_chart(fig, name: str, **kwargs):
+    """st.plotly_chart that records the chart's serialization time and payload size."""
+    profile = _current()
+    if profile is None:
+        return st.plotly_chart(fig, **kwargs)
+    start = time.perf_counter()
+    element = st.plotly_chart(fig, **kwargs)
+    elapsed = time.perf_counter() - start
+    profile.charts.append((name, len(fig.to_json().encode('utf-8')), elapsed))
+    return element
+
+def finish_render():
+    """Logs the rerun's profile and renders the developer panel."""
+    profile = _current()
+    if profile is None:
+        return
+    record = profile.to_record()
+    profile.finished = True
+
+    line = json.dumps(record)
+    logging.info(line)
+    if Config.PROFILE_LOG_PATH:
+        with open(Config.PROFILE_LOG_PATH, "a") as f:
+            f.write(line + "\n")
+
+    with st.expander(f"🛠️ Render profile: {record['total_s'] * 1000:,.0f} ms"):
+        sections = pd.DataFrame(record["sections"], columns=["name", "depth", "seconds"])
+        sections["Section"] = ["· " * depth + name for name, depth in zip(sections["name"], sections["depth"])]
+        sections["ms"] = sections["seconds"] * 1000
+        st.dataframe(sections[["Section", "ms"]], hide_index=True, use_container_width=True)
+        st.dataframe(
+            pd.DataFrame([{"Function": name, **counts} for name, counts in record["cache"].items()],
+                         columns=["Function", "hits", "misses"]),
+            hide_index=True, use_container_width=True
+        )
+        st.dataframe(
+            pd.DataFrame([{"Chart": c["name"], "KB": c["bytes"] / 1024, "ms": c["seconds"] * 1000}
+                          for c in record["charts"]], columns=["Chart", "KB", "ms"]),
+            hide_index=True, use_container_width=True
+        )
+
+# --- Log Summary ---
+
+def summarize_profiles(records: List[dict]) -> pd.DataFrame:
+    """Aggregates render profiles into per-section hot spots.
+
+    Args:
+        records (List[dict]): Records as written by finish_render.
+
+    Returns:
+        pd.DataFrame: Per page and section: reruns, p50/p95 milliseconds and
+        total seconds, slowest total first. Sending a chart to the browser
+        counts as a section named "send: <chart>" with its payload kilobytes.
+    """
+    rows = []
+    for record in records:
+        rows.append({"page": record["page"], "section": "(total)", "seconds": record["total_s"], "kb": None})
+        for section in record["sections"]:
+            rows.append({"page": record["page"], "section": section["name"], "seconds": section["seconds"], "kb": None})
+        for chart in record["charts"]:
+            rows.append({"page": record["page"], "section": f"send: {chart['name']}",
+                         "seconds": chart["seconds"], "kb": chart["bytes"] / 1024})
+    df = pd.DataFrame(rows, columns=["page", "section", "seconds", "kb"])
+    grouped = df.groupby(["page", "section"])
+    summary = pd.DataFrame({
+        "reruns": grouped.size(),
+        "p50_ms": grouped["seconds"].median() * 1000,
+        "p95_ms": grouped["seconds"].quantile(0.95) * 1000,
+        "total_s": grouped["seconds"].sum(),
+        "avg_kb": grouped["kb"].mean(),
+    })
+    return summary.sort_values("total_s", ascending=False).reset_index()
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Render profiling tools.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    summarize_parser = subparsers.add_parser("summarize", help="Aggregate a render profile log.")
+    summarize_parser.add_argument("log", help="JSON lines written via PROFILE_LOG_PATH.")
+    summarize_parser.add_argument("--top", type=int, default=25, help="Number of sections to show.")
+    args = parser.parse_args()
+
+    with open(args.log) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    summary = summarize_profiles(records)
+    print(f"{len(records)} reruns\n")
+    print(summary.head(args.top).to_string(index=False, float_format=lambda x: f"{x:,.1f}"))
+
+if __name__ == "__main__":
+    main()
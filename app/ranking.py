@@ -0,0 +1,114 @@
+"""
+Top-N ranking shared by the pages.
+
+Rankings use partial selection instead of a full sort: np.argpartition finds
+the N best rows in linear time and only those N are sorted, so ranking many
+suppliers, products or customers costs O(rows + N log N). Ties are broken by
+row order, which makes every ranking deterministic (aggregate() returns
+groups sorted by key, so tied groups rank alphabetically). Missing values
+rank last in either direction. Other values (e.g. text) fall back to a stable
+sort with the same ordering rules.
+"""
+
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+OTHER_LABEL = "Other"
+
+def is_rankable(values: pd.Series) -> bool:
+    """Whether values can be ranked by partial selection (numeric, boolean or datetime)."""
+    return (pd.api.types.is_numeric_dtype(values) or pd.api.types.is_datetime64_any_dtype(values)) \
+        and not isinstance(values.dtype, pd.CategoricalDtype)
+
+def _rank_key(values: pd.Series, ascending: bool) -> np.ndarray:
+    """Maps numeric or datetime values to float keys where smaller ranks first and missing is +inf."""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        key = values.to_numpy(dtype='datetime64[ns]').astype(np.int64).astype(np.float64)
+    else:
+        key = values.to_numpy(dtype=np.float64, na_value=np.nan)
+    return np.where(values.isna().to_numpy(), np.inf, key if ascending else -key)
+
+def top_n_positions(values: pd.Series, n: int = None, ascending: bool = False) -> np.ndarray:
+    """Finds the row positions of the N best values, in rank order.
+
+    Args:
+        values (pd.Series): The values to rank; see is_rankable for the
+            dtypes ranked by partial selection.
+        n (int, optional): How many positions to return (fewer if there are
+            fewer rows); default all.
+        ascending (bool): Rank the smallest values first instead of the largest.
+
+    Returns:
+        np.ndarray: Positions into `values`; ties keep their row order.
+    """
+    n = len(values) if n is None else max(0, min(n, len(values)))
+    if not is_rankable(values):
+        order = values.reset_index(drop=True).sort_values(ascending=ascending, kind='stable', na_position='last')
+        return order.index.to_numpy()[:n]
+
+    key = _rank_key(values, ascending)
+    if n == 0:
+        return np.array([], dtype=np.int64)
+    if n < len(key):
+        # Everything better than the N-th value, then the earliest rows tied with it
+        threshold = key[np.argpartition(key, n - 1)[n - 1]]
+        better = np.flatnonzero(key < threshold)
+        tied = np.flatnonzero(key == threshold)[:n - len(better)]
+        chosen = np.concatenate([better, tied])
+    else:
+        chosen = np.arange(len(key))
+    return chosen[np.lexsort((chosen, key[chosen]))]
+
+def top_n(df: pd.DataFrame, metric: str, n: int, ascending: bool = False,
+          other_label_col: str = None, other_label: str = OTHER_LABEL) -> pd.DataFrame:
+    """Selects the top N rows of a frame by one metric.
+
+    Args:
+        df (pd.DataFrame): One row per entity (e.g. an aggregate).
+        metric (str): The column to rank by.
+        n (int): Number of rows to keep.
+        ascending (bool): Keep the smallest values instead of the largest.
+        other_label_col (str, optional): When given and rows were cut, an
+            extra row labelled `other_label` in this column holds the sum of
+            the metric over the remaining rows.
+        other_label (str): The label of the "Other" row.
+
+    Returns:
+        pd.DataFrame: The top rows in rank order, plus the optional "Other" row.
+    """
+    positions = top_n_positions(df[metric], n, ascending)
+    top = df.iloc[positions]
+    if other_label_col is None or len(positions) == len(df):
+        return top.reset_index(drop=True)
+
+    # The rest is the total minus the top rows, so the remaining rows are never materialized
+    other_value = df[metric].sum() - top[metric].sum()
+    return pd.DataFrame({
+        other_label_col: np.append(top[other_label_col].to_numpy(dtype=object), other_label),
+        metric: np.append(top[metric].to_numpy(), other_value),
+    })
+
+def rank_metrics(df: pd.DataFrame, label_col: str, metrics: List[str], n: int = None,
+                 group_other: bool = False, other_label: str = OTHER_LABEL) -> Dict[str, pd.DataFrame]:
+    """Ranks the same entities by several metrics.
+
+    Args:
+        df (pd.DataFrame): One row per entity with a column per metric.
+        label_col (str): The entity label column (e.g. SupplierName).
+        metrics (List[str]): The columns to rank by, largest first.
+        n (int, optional): Number of entities per ranking; default all.
+        group_other (bool): Add an "Other" row summing each metric's rest.
+        other_label (str): The label of the "Other" row.
+
+    Returns:
+        Dict[str, pd.DataFrame]: Per metric, the label and metric columns in
+        rank order.
+    """
+    n = len(df) if n is None else n
+    return {
+        metric: top_n(df[[label_col, metric]], metric, n,
+                      other_label_col=label_col if group_other else None, other_label=other_label)
+        for metric in metrics
+    }
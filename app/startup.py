@@ -0,0 +1,142 @@
+"""
+Startup module for cold-start performance.
+
+Provides an import-time profile of the modules a page render needs, a
+warm-up hook that preloads the dataset snapshot at container boot, and
+tracking of the time from process start to the first completed render.
+
+Usage:
+    python -m app.startup profile [--top N]
+    python -m app.startup warmup
+"""
+
+import argparse
+import logging
+import os
+import re
+import subprocess
+import sys
+import time
+from typing import List, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Modules imported on the way to a first page render
+PAGE_IMPORTS = [
+    "streamlit",
+    "pandas",
+    "app.main",
+    "app.ui.shared_components",
+    "plotly.express",
+]
+
+_IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+_MODULE_IMPORT_TIME = time.time()
+_first_render_logged = False
+
+def _process_start_time() -> float:
+    """Returns the process start time as a UNIX timestamp.
+
+    Reads /proc on Linux (the container platform); elsewhere falls back to the
+    time this module was first imported.
+    """
+    try:
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/stat") as f:
+            boot_time = next(int(line.split()[1]) for line in f if line.startswith("btime"))
+        return boot_time + start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, StopIteration):
+        return _MODULE_IMPORT_TIME
+
+def record_first_render(page: str):
+    """Logs the time from process start to the first completed page render.
+
+    Only the first call in a process is recorded; later calls are no-ops.
+
+    Args:
+        page (str): The name of the page that finished rendering.
+    """
+    global _first_render_logged
+    if _first_render_logged:
+        return
+    _first_render_logged = True
+    elapsed = time.time() - _process_start_time()
+    logging.info(f"time_to_first_render_seconds={elapsed:.3f} page={page!r}")
+
+def profile_imports(modules: Optional[List[str]] = None) -> List[Tuple[str, float, float]]:
+    """Measures import time per module in a fresh interpreter.
+
+    Args:
+        modules (List[str], optional): Modules to import; defaults to PAGE_IMPORTS.
+
+    Returns:
+        List[Tuple[str, float, float]]: (module, self ms, cumulative ms) for every
+        module imported, sorted by cumulative time, slowest first.
+    """
+    modules = modules or PAGE_IMPORTS
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {', '.join(modules)}"],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Import profiling failed:\n{result.stderr[-2000:]}")
+
+    timings = []
+    for line in result.stderr.splitlines():
+        match = _IMPORT_TIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, _, module = match.groups()
+            timings.append((module, int(self_us) / 1000, int(cumulative_us) / 1000))
+    return sorted(timings, key=lambda row: row[2], reverse=True)
+
+def warm_up() -> bool:
+    """Preloads the dataset into the on-disk snapshot before the server starts.
+
+    Only runs when WARMUP_ON_BOOT is enabled and a snapshot directory is
+    configured, since the snapshot is how the preloaded data reaches the
+    Streamlit server process.
+
+    Returns:
+        bool: True if a fresh snapshot was written.
+    """
+    from app.config import Config
+    from app.etl.load import save_snapshot
+    from app.main import build_sales_data
+
+    if not (Config.WARMUP_ON_BOOT and Config.DATA_SNAPSHOT_DIR):
+        logging.info("Warm-up skipped (set WARMUP_ON_BOOT=true and DATA_SNAPSHOT_DIR to enable).")
+        return False
+
+    start = time.perf_counter()
+    sales_data = build_sales_data()
+    if sales_data is None:
+        logging.error("Warm-up failed: the dataset could not be built.")
+        return False
+
+    saved = save_snapshot(sales_data, Config.DATA_SNAPSHOT_DIR)
+    logging.info(f"Warm-up finished in {time.perf_counter() - start:.2f}s.")
+    return saved
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Cold-start profiling and warm-up.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    profile_parser = subparsers.add_parser("profile", help="Show import time per module.")
+    profile_parser.add_argument("--top", type=int, default=25, help="Number of modules to show.")
+    subparsers.add_parser("warmup", help="Preload the dataset snapshot.")
+    args = parser.parse_args()
+
+    if args.command == "profile":
+        timings = profile_imports()
+        total = sum(self_ms for _, self_ms, _ in timings)
+        print(f"Total import time: {total:,.0f} ms across {len(timings)} modules\n")
+        print(f"{'cumulative ms':>14} {'self ms':>10}  module")
+        for module, self_ms, cumulative_ms in timings[:args.top]:
+            print(f"{cumulative_ms:>14,.1f} {self_ms:>10,.1f}  {module}")
+    elif args.command == "warmup":
+        warm_up()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+"""
+Chart library access for the dashboard pages.
+"""
+
+def plotly_express():
+    """Returns the plotly.express module, importing it on first use.
+
+    Plotly Express costs about 170 ms to import on top of Streamlit, so pages
+    only import it once they have data to chart. plotly.graph_objects needs no
+    deferral: Streamlit already imports it at startup.
+    """
+    import plotly.express as px
+    return px
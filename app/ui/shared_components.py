@@ -5,98 +5,281 @@ Manages session state for filters.
 import streamlit as st
 import pandas as pd
 from datetime import date
+from functools import partial
+from typing import Union
+from app.exports import EXPORT_FORMATS, export_dataframe
+from app.etl.load import select_date_range
+from app.etl.transform import create_order_facts
+from app.etl.utils import map_country_to_region
+from app.config import Config
+from app.main import load_distinct_sketches, load_filter_options, load_shipping_histograms, build_shipping_histograms
+from app.sketches import HistogramCube
+from app.direct_query import query_filter_options
+from app.profiling import profile_section
 
-def create_download_button(df: pd.DataFrame, filename: str):
-    """Creates a Streamlit download button for a DataFrame."""
-    csv = df.to_csv(index=False).encode('utf-8')
-    st.download_button(
-        label="📥 Download as CSV",
-        data=csv,
-        file_name=f"{filename}.csv",
-        mime="text/csv",
-    )
+def create_download_button(df: pd.DataFrame, filename: str, label: str = "📥 Download"):
+    """Creates lazy download buttons for a DataFrame in CSV, Parquet and Arrow formats.
+
+    Nothing is serialized during the script run; each file is generated when
+    its button is clicked and cached per data fingerprint.
+    """
+    columns = st.columns(len(EXPORT_FORMATS))
+    for column, (fmt, spec) in zip(columns, EXPORT_FORMATS.items()):
+        column.download_button(
+            label=f"{label} as {spec['label']}",
+            data=partial(export_dataframe, df, fmt),
+            file_name=f"{filename}.{spec['extension']}",
+            mime=spec['mime'],
+            key=f"download_{filename}_{fmt}",
+            on_click="ignore",
+        )
 
-def get_quarter_options(sales_data: pd.DataFrame) -> dict:
+def get_quarter_options(first_order: date, last_order: date, quarters) -> dict:
     """Generates a dictionary of quarter-based date ranges."""
-    sales_data['YearQuarter'] = sales_data['OrderDate'].dt.to_period('Q').astype(str)
-    quarters = sorted(sales_data['YearQuarter'].unique())
-    
-    options = {"Full History": (sales_data['OrderDate'].min().date(), sales_data['OrderDate'].max().date())}
-    for q in quarters:
-        period = pd.Period(q)
-        options[q] = (period.start_time.date(), period.end_time.date())
+    options = {"Full History": (first_order, last_order)}
+    for period in quarters:
+        options[str(period)] = (period.start_time.date(), period.end_time.date())
     return options
 
-def initialize_state(sales_data: pd.DataFrame):
-    """Initializes session state for filters if they don't exist."""
+def get_direct_quarter_options(first_order: date, last_order: date) -> dict:
+    """Generates the quarter-based date ranges between two dates (direct-query mode)."""
+    return get_quarter_options(first_order, last_order, pd.period_range(first_order, last_order, freq='Q'))
+
+def group_countries_by_region(countries) -> dict:
+    """Maps each region to the sorted countries that belong to it."""
+    countries_by_region = {}
+    for country in sorted(countries):
+        countries_by_region.setdefault(map_country_to_region(country), []).append(country)
+    return countries_by_region
+
+def _initialize_filter_state(first_order: date, last_order: date, countries_by_region: dict, categories: list):
+    """Selects the full date range and every region, country and category on first use."""
     if 'start_date' not in st.session_state:
-        st.session_state.start_date = sales_data['OrderDate'].min().date()
-        st.session_state.end_date = sales_data['OrderDate'].max().date()
-        st.session_state.selected_regions = sorted(sales_data['Region'].unique())
-        st.session_state.selected_countries = sorted(sales_data['Country'].unique())
-        st.session_state.selected_categories = sorted(sales_data['CategoryName'].unique())
+        st.session_state.selected_timeframe = "Full History"
+        st.session_state.start_date = first_order
+        st.session_state.end_date = last_order
+        st.session_state.selected_regions = sorted(countries_by_region)
+        st.session_state.selected_countries = sorted(c for countries in countries_by_region.values() for c in countries)
+        st.session_state.selected_categories = list(categories)
 
-def render_sidebar(sales_data: pd.DataFrame) -> pd.DataFrame:
-    """Renders the sidebar controls and returns the filtered DataFrame."""
-    initialize_state(sales_data)
+# --- Sidebar Callbacks ---
+# Each widget writes through its own key and a callback copies the value into
+# the filter state before the script runs, so an interaction costs exactly one
+# render. Streamlit drops the state of widgets that a page does not render (the
+# landing page has no sidebar), so the filter state lives in separate keys and
+# is copied back into the widgets on every run.
+_WIDGET_KEYS = {
+    'selected_timeframe': 'sidebar_timeframe',
+    'selected_regions': 'sidebar_regions',
+    'selected_countries': 'sidebar_countries',
+    'selected_categories': 'sidebar_categories',
+}
+
+def _on_filter_change(state_key: str):
+    """Copies a sidebar widget's new value into the filter state."""
+    st.session_state[state_key] = st.session_state[_WIDGET_KEYS[state_key]]
+
+def _on_regions_change(countries_by_region: dict):
+    """Cascades a region change: every country of the selected regions is selected."""
+    _on_filter_change('selected_regions')
+    st.session_state.selected_countries = sorted(
+        c for r in st.session_state.selected_regions for c in countries_by_region.get(r, [])
+    )
+
+def select_countries_from_widget(widget_key: str):
+    """on_change callback for in-page country pickers that drive the dashboard filters.
 
+    The picked countries replace the country selection, and their regions are
+    added to the region selection so the picks take effect.
+    """
+    countries = st.session_state[widget_key]
+    st.session_state.selected_countries = list(countries)
+    st.session_state.selected_regions = sorted(
+        set(st.session_state.selected_regions) | {map_country_to_region(c) for c in countries}
+    )
+
+def _reset_filters():
+    """Clears the session so the filters start over from their defaults."""
+    for key in list(st.session_state.keys()):
+        del st.session_state[key]
+
+def _render_filter_controls(quarter_options: dict, countries_by_region: dict, categories: list):
+    """Renders the sidebar filter widgets and keeps the selections in session state."""
     st.sidebar.header("Dashboard Controls")
 
+    # --- Cascading options, and widget values restored from the filter state ---
+    if st.session_state.selected_timeframe not in quarter_options:
+        st.session_state.selected_timeframe = "Full History"
+    available_countries = sorted(c for r in st.session_state.selected_regions for c in countries_by_region.get(r, []))
+    st.session_state.category_options = list(categories)
+    widget_values = {
+        'selected_timeframe': st.session_state.selected_timeframe,
+        'selected_regions': [r for r in st.session_state.selected_regions if r in countries_by_region],
+        'selected_countries': [c for c in st.session_state.selected_countries if c in available_countries],
+        'selected_categories': [c for c in st.session_state.selected_categories if c in categories],
+    }
+    for state_key, value in widget_values.items():
+        st.session_state[_WIDGET_KEYS[state_key]] = value
+
     # --- Quarter-based Date Selector ---
-    quarter_options = get_quarter_options(sales_data)
-    selected_quarter = st.sidebar.selectbox(
+    st.sidebar.selectbox(
         "Select Timeframe",
         options=list(quarter_options.keys()),
-        index=0 
+        key=_WIDGET_KEYS['selected_timeframe'],
+        on_change=_on_filter_change, args=('selected_timeframe',)
     )
-    st.session_state.start_date, st.session_state.end_date = quarter_options[selected_quarter]
+    st.session_state.start_date, st.session_state.end_date = quarter_options[st.session_state.selected_timeframe]
 
-    # --- Region Filter (Event-Driven) ---
-    user_selected_regions = st.sidebar.multiselect(
+    # --- Region Filter (cascades to the countries) ---
+    st.sidebar.multiselect(
         'Select Regions',
-        options=sorted(sales_data['Region'].unique()),
-        default=st.session_state.selected_regions
+        options=sorted(countries_by_region),
+        key=_WIDGET_KEYS['selected_regions'],
+        on_change=_on_regions_change, args=(countries_by_region,)
     )
-    if user_selected_regions != st.session_state.selected_regions:
-        st.session_state.selected_regions = user_selected_regions
-        new_available_countries = sorted(sales_data[sales_data['Region'].isin(user_selected_regions)]['Country'].unique())
-        st.session_state.selected_countries = new_available_countries
-        st.rerun()
-
-    # --- Country Filter (Event-Driven) ---
-    available_countries = sorted(sales_data[sales_data['Region'].isin(st.session_state.selected_regions)]['Country'].unique())
-    user_selected_countries = st.sidebar.multiselect(
+
+    # --- Country Filter (options follow the selected regions) ---
+    st.sidebar.multiselect(
         'Select Countries',
         options=available_countries,
-        default=st.session_state.selected_countries
+        key=_WIDGET_KEYS['selected_countries'],
+        on_change=_on_filter_change, args=('selected_countries',)
     )
-    if user_selected_countries != st.session_state.selected_countries:
-        st.session_state.selected_countries = user_selected_countries
-        st.rerun()
-    
-    # --- Category Filter (Event-Driven) ---
-    user_selected_categories = st.sidebar.multiselect(
+
+    # --- Category Filter ---
+    st.sidebar.multiselect(
         'Select Product Categories',
-        options=sorted(sales_data['CategoryName'].unique()),
-        default=st.session_state.selected_categories
+        options=st.session_state.category_options,
+        key=_WIDGET_KEYS['selected_categories'],
+        on_change=_on_filter_change, args=('selected_categories',)
     )
-    if user_selected_categories != st.session_state.selected_categories:
-        st.session_state.selected_categories = user_selected_categories
-        st.rerun()
 
     # --- Reset Button ---
-    if st.sidebar.button("Reset All Filters"):
-        for key in list(st.session_state.keys()):
-            del st.session_state[key]
-        st.rerun()
+    st.sidebar.button("Reset All Filters", on_click=_reset_filters)
+
+@profile_section("sidebar filters")
+def render_sidebar(sales_data: pd.DataFrame) -> pd.DataFrame:
+    """Renders the sidebar controls and returns the filtered DataFrame."""
+    options = load_filter_options()
+    countries_by_region = group_countries_by_region(options['countries'])
+    _initialize_filter_state(options['first_order'], options['last_order'], countries_by_region, options['categories'])
+    _render_filter_controls(
+        get_quarter_options(options['first_order'], options['last_order'], options['quarters']),
+        countries_by_region, options['categories']
+    )
 
     # --- Final Data Filtering ---
-    filtered_data = sales_data[
-        (sales_data['Region'].isin(st.session_state.selected_regions)) &
-        (sales_data['Country'].isin(st.session_state.selected_countries)) &
-        (sales_data['CategoryName'].isin(st.session_state.selected_categories)) &
-        (sales_data['OrderDate'].dt.date >= st.session_state.start_date) &
-        (sales_data['OrderDate'].dt.date <= st.session_state.end_date)
+    # The date range prunes to the matching month partitions before the other filters run
+    in_range = select_date_range(sales_data, st.session_state.start_date, st.session_state.end_date)
+    filtered_data = in_range[
+        (in_range['Region'].isin(st.session_state.selected_regions)) &
+        (in_range['Country'].isin(st.session_state.selected_countries)) &
+        (in_range['CategoryName'].isin(st.session_state.selected_categories))
     ]
     
-    return filtered_data
\ No newline at end of file
+    return filtered_data
+
+def use_direct_query() -> bool:
+    """Whether pages should query aggregates from the database instead of the ETL output."""
+    return Config.DATA_MODE == "direct"
+
+@profile_section("sidebar filters")
+def render_direct_sidebar() -> Union[dict, None]:
+    """Renders the sidebar controls from database metadata (direct-query mode).
+
+    Returns:
+        dict | None: The current filters (see current_filters), or None if the
+        database cannot be reached.
+    """
+    options = query_filter_options()
+    if options is None:
+        st.error("Failed to query the database. Please check your configuration.")
+        return None
+
+    countries_by_region = group_countries_by_region(options['countries'])
+    _initialize_filter_state(options['first_order'], options['last_order'], countries_by_region, options['categories'])
+    _render_filter_controls(
+        get_direct_quarter_options(options['first_order'], options['last_order']),
+        countries_by_region, options['categories']
+    )
+    return current_filters()
+
+def current_filters() -> dict:
+    """The sidebar selections as filter parameters for app.direct_query."""
+    return {
+        "start_date": st.session_state.start_date,
+        "end_date": st.session_state.end_date,
+        "countries": tuple(
+            c for c in st.session_state.selected_countries
+            if map_country_to_region(c) in st.session_state.selected_regions
+        ),
+        "categories": tuple(st.session_state.selected_categories) if category_filter_active() else None,
+    }
+
+def category_filter_active() -> bool:
+    """Whether the category filter currently excludes any category."""
+    return not set(st.session_state.category_options) <= set(st.session_state.selected_categories)
+
+@profile_section("filter: order facts")
+def filter_order_facts(order_facts: pd.DataFrame, filtered_data: pd.DataFrame) -> pd.DataFrame:
+    """Returns the order-grain rows matching the current sidebar filters.
+
+    Region, country and date are order attributes and are applied directly to
+    the order facts. Categories belong to line items, so when the category
+    filter excludes anything the orders are rebuilt from the filtered lines.
+    """
+    if category_filter_active():
+        return create_order_facts(filtered_data)
+
+    in_range = select_date_range(order_facts, st.session_state.start_date, st.session_state.end_date)
+    return in_range[
+        (in_range['Region'].isin(st.session_state.selected_regions)) &
+        (in_range['Country'].isin(st.session_state.selected_countries))
+    ]
+
+def use_approx_distinct_counts() -> bool:
+    """Whether distinct counts should come from HyperLogLog sketches."""
+    return Config.DISTINCT_COUNT_MODE == "approx"
+
+@profile_section("sketch: distinct counts")
+def approx_distinct_count(cube_name: str, by: str = None):
+    """Estimates a distinct count for the current sidebar filters from sketches.
+
+    Args:
+        cube_name (str): A cube built by load_distinct_sketches.
+        by (str, optional): A cube dimension to break the count down by.
+
+    Returns:
+        int | pd.Series: The estimate, or one estimate per value of `by`.
+    """
+    cube = load_distinct_sketches()[cube_name]
+    cells = cube.cells
+    mask = (
+        (cells['Region'].isin(st.session_state.selected_regions)) &
+        (cells['Country'].isin(st.session_state.selected_countries)) &
+        (cells['CategoryName'].isin(st.session_state.selected_categories)) &
+        (cells['OrderMonth'] >= pd.Period(st.session_state.start_date, freq='M')) &
+        (cells['OrderMonth'] <= pd.Period(st.session_state.end_date, freq='M'))
+    )
+    return cube.count(mask.to_numpy(), by=by)
+
+@profile_section("filter: shipping histograms")
+def filter_shipping_histograms(filtered_data: pd.DataFrame) -> HistogramCube:
+    """Returns the shipping-day histograms for the current sidebar filters.
+
+    Cells of the prebuilt cube are selected by month, region and country.
+    Orders have no category, so a narrowed category filter histograms the
+    orders rebuilt from the filtered lines instead.
+    """
+    if category_filter_active():
+        return build_shipping_histograms(create_order_facts(filtered_data))
+
+    cube = load_shipping_histograms()
+    cells = cube.cells
+    mask = (
+        (cells['Region'].isin(st.session_state.selected_regions)) &
+        (cells['Country'].isin(st.session_state.selected_countries)) &
+        (cells['OrderMonth'] >= pd.Period(st.session_state.start_date, freq='M')) &
+        (cells['OrderMonth'] <= pd.Period(st.session_state.end_date, freq='M'))
+    )
+    return cube.select(mask.to_numpy())
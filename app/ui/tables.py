@@ -0,0 +1,136 @@
+"""
+Server-side paginated tables.
+
+Sorting, searching and paging run on the server, so the browser only ever
+receives the rows of the visible page instead of the whole frame. Large
+line-level views (e.g. every order line matching the filters) then cost a
+page-sized payload per rerun, and the table runs in a fragment so paging
+reruns only the table.
+"""
+
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from app.ranking import top_n_positions
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+def search_mask(df: pd.DataFrame, query: str, columns: List[str] = None) -> np.ndarray:
+    """Flags the rows where any of the columns contains the query (case-insensitive).
+
+    Args:
+        df (pd.DataFrame): The rows to search.
+        query (str): The text to look for; an empty query matches every row.
+        columns (List[str], optional): The columns to search. Defaults to the
+            text (object, string and category) columns.
+
+    Returns:
+        np.ndarray: A boolean mask with one entry per row.
+    """
+    if not query:
+        return np.ones(len(df), dtype=bool)
+    if columns is None:
+        columns = list(df.select_dtypes(include=['object', 'string', 'category']).columns)
+    mask = np.zeros(len(df), dtype=bool)
+    for column in columns:
+        mask |= df[column].str.contains(query, case=False, regex=False, na=False).to_numpy(dtype=bool)
+    return mask
+
+def sorted_positions(df: pd.DataFrame, sort_by: str = None, ascending: bool = True,
+                     query: str = "", search_columns: List[str] = None,
+                     limit: int = None) -> Tuple[np.ndarray, int]:
+    """Finds the rows matching a search, in display order.
+
+    Sorting is stable with missing values last, so equal values keep their
+    original order and every page boundary is deterministic. Rows are ordered
+    by app.ranking.top_n_positions: with a limit, numeric and date columns are
+    ranked by partial selection, so the early pages of a large table never
+    sort it whole.
+
+    Args:
+        df (pd.DataFrame): The full table.
+        sort_by (str, optional): The column to sort on; None keeps the frame order.
+        ascending (bool): Sort direction.
+        query (str): Search text (see search_mask).
+        search_columns (List[str], optional): The columns to search.
+        limit (int, optional): Only the first `limit` positions are needed.
+
+    Returns:
+        Tuple[np.ndarray, int]: Row positions into df (at most `limit`) and
+        the number of rows matching the search.
+    """
+    positions = np.flatnonzero(search_mask(df, query, search_columns))
+    total = len(positions)
+    if sort_by is not None:
+        positions = positions[top_n_positions(df[sort_by].iloc[positions], limit, ascending)]
+    return positions[:limit], total
+
+def page_rows(df: pd.DataFrame, page: int, page_size: int, **order) -> Tuple[pd.DataFrame, int]:
+    """Searches, sorts and slices a frame down to one page of rows.
+
+    Args:
+        df (pd.DataFrame): The full table.
+        page (int): The 1-based page number.
+        page_size (int): Rows per page.
+        **order: Sort and search arguments of sorted_positions.
+
+    Returns:
+        Tuple[pd.DataFrame, int]: The rows of the page and the number of
+        rows matching the search.
+    """
+    start = (page - 1) * page_size
+    positions, total = sorted_positions(df, limit=start + page_size, **order)
+    return df.iloc[positions[start:]], total
+
+def _reset_page(key: str):
+    """Jumps back to the first page when the search, sort or page size changes."""
+    st.session_state[f"{key}_page"] = 1
+
+@st.fragment
+def render_paginated_table(df: pd.DataFrame, key: str, sort_by: str = None, ascending: bool = False,
+                           search_columns: List[str] = None, page_size: int = 50):
+    """Renders a searchable, sortable table that sends one page of rows at a time.
+
+    Args:
+        df (pd.DataFrame): The full table; it stays on the server.
+        key (str): A unique prefix for the table's widget keys.
+        sort_by (str, optional): The initial sort column; defaults to the first column.
+        ascending (bool): The initial sort direction.
+        search_columns (List[str], optional): The columns the search box looks
+            in. Defaults to the text columns.
+        page_size (int): The initial number of rows per page (one of PAGE_SIZES).
+    """
+    columns = list(df.columns)
+    search_col, sort_col, order_col, size_col = st.columns([3, 2, 1, 1])
+    query = search_col.text_input("Search", key=f"{key}_search", placeholder="Search...",
+                                  on_change=_reset_page, args=(key,))
+    sort_column = sort_col.selectbox("Sort by", columns, index=columns.index(sort_by) if sort_by in columns else 0,
+                                     key=f"{key}_sort", on_change=_reset_page, args=(key,))
+    order = order_col.selectbox("Order", ["Descending", "Ascending"], index=int(ascending),
+                                key=f"{key}_order", on_change=_reset_page, args=(key,))
+    rows_per_page = size_col.selectbox("Rows per page", PAGE_SIZES, index=PAGE_SIZES.index(page_size),
+                                       key=f"{key}_size", on_change=_reset_page, args=(key,))
+
+    sort_and_search = dict(sort_by=sort_column, ascending=order == "Ascending", query=query, search_columns=search_columns)
+    page_key = f"{key}_page"
+    page = max(1, st.session_state.get(page_key, 1))
+    rows, total = page_rows(df, page, rows_per_page, **sort_and_search)
+
+    # Clamp the page before its widget is created, e.g. after the filters shrank the table
+    n_pages = max(1, -(-total // rows_per_page))
+    if page > n_pages:
+        page = n_pages
+        rows, total = page_rows(df, page, rows_per_page, **sort_and_search)
+    st.session_state[page_key] = page
+    first_row = (page - 1) * rows_per_page
+    st.dataframe(rows, hide_index=True, use_container_width=True)
+
+    page_col, caption_col = st.columns([1, 4])
+    page_col.number_input("Page", min_value=1, max_value=n_pages, step=1, key=page_key)
+    caption_col.caption(
+        f"Rows {first_row + 1 if total else 0:,}–{first_row + len(rows):,} of {total:,}"
+        + (f" matching \"{query}\"" if query else "") + f" · page {page} of {n_pages}"
+    )
@@ -1,88 +1,137 @@
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
-from app.main import run_etl_pipeline
-from app.ui.shared_components import render_sidebar
+from app.startup import record_first_render
+from app.profiling import start_render, finish_render, plotly_chart, profile_section
+from app.main import run_etl_pipeline, load_order_facts
+from app.direct_query import query_kpis, query_revenue_trend
+from app.ui.shared_components import (
+    render_sidebar, filter_order_facts, use_approx_distinct_counts, approx_distinct_count,
+    use_direct_query, render_direct_sidebar
+)
 from datetime import date, timedelta
 
 st.set_page_config(layout="wide", page_title="Strategic Overview")
+start_render("Strategic Overview")
 
-def get_comparison_data(sales_data, start_date, end_date, period_type):
+@profile_section("aggregate: daily totals")
+def daily_totals(order_facts):
+    """Aggregates order facts to one row per day with revenue and order count."""
+    return order_facts.groupby(order_facts['OrderDate'].dt.normalize()).agg(
+        Revenue=('Revenue', 'sum'),
+        Orders=('Revenue', 'size')
+    ).reset_index()
+
+def get_comparison_data(history, start_date, end_date, period_type):
     """Calculates metrics for a comparison period."""
     if period_type == "Same Period Last Year":
-        comp_start_date = start_date.replace(year=start_date.year - 1)
-        comp_end_date = end_date.replace(year=end_date.year - 1)
-        # We use the full, un-filtered sales_data for historical comparison
-        return sales_data[
-            (sales_data['OrderDate'].dt.date >= comp_start_date) &
-            (sales_data['OrderDate'].dt.date <= comp_end_date)
+        comp_start_date = pd.Timestamp(start_date.replace(year=start_date.year - 1))
+        comp_end_date = pd.Timestamp(end_date.replace(year=end_date.year - 1)) + pd.Timedelta(days=1)
+        # We use the full, un-filtered daily totals for historical comparison
+        return history[
+            (history['OrderDate'] >= comp_start_date) &
+            (history['OrderDate'] < comp_end_date)
         ]
     return None # Return None for "None" or any other case
 
-st.title("📈 Strategic Overview")
+@profile_section("chart: sparkline")
+def create_sparkline(data, y_col, x_col='OrderDate'):
+    """A minimal area chart to sit under a KPI."""
+    fig = go.Figure(go.Scatter(x=data[x_col], y=data[y_col], mode='lines', fill='tozeroy', line_shape='spline'))
+    fig.update_layout(showlegend=False, xaxis_visible=False, yaxis_visible=False, margin=dict(l=0, r=0, t=0, b=0), height=50)
+    return fig
 
-sales_data = run_etl_pipeline()
-if sales_data is not None:
-    filtered_data = render_sidebar(sales_data)
+@st.fragment
+def render_kpis(daily, history, active_customers, start_date, end_date):
+    """KPI row with sparklines; changing the comparison reruns only this fragment."""
+    # --- Local Control for KPI Comparison ---
+    st.markdown("### KPI Comparison")
+    comparison_period = st.selectbox(
+        "Compare KPIs against:",
+        ["None", "Same Period Last Year"],
+        label_visibility="collapsed"
+    )
+    
+    # --- KPI Calculations ---
+    main_total_revenue = daily['Revenue'].sum()
+    main_total_orders = int(daily['Orders'].sum())
+    
+    qoq_growth = 0
+    last_order_date = daily['OrderDate'].max()
+    current_quarter_period = pd.Period(last_order_date, freq='Q')
+    previous_quarter_period = current_quarter_period - 1
+    history_quarters = history['OrderDate'].dt.to_period('Q')
+    current_quarter_revenue = history[history_quarters == current_quarter_period]['Revenue'].sum()
+    previous_quarter_revenue = history[history_quarters == previous_quarter_period]['Revenue'].sum()
+    if previous_quarter_revenue > 0:
+        qoq_growth = (current_quarter_revenue - previous_quarter_revenue) / previous_quarter_revenue
 
-    if filtered_data.empty:
-        st.warning("No data available for the selected filters.")
-    else:
-        # --- Local Control for KPI Comparison ---
-        st.markdown("### KPI Comparison")
-        comparison_period = st.selectbox(
-            "Compare KPIs against:",
-            ["None", "Same Period Last Year"],
-            label_visibility="collapsed"
-        )
-        
-        # --- KPI Calculations ---
-        main_total_revenue = filtered_data['Revenue'].sum()
-        main_total_orders = filtered_data['OrderID'].nunique()
-        
-        qoq_growth = 0
-        if not filtered_data.empty:
-            last_order_date = filtered_data['OrderDate'].max()
-            current_quarter_period = pd.Period(last_order_date, freq='Q')
-            previous_quarter_period = current_quarter_period - 1
-            current_quarter_revenue = sales_data[sales_data['OrderDate'].dt.to_period('Q') == current_quarter_period]['Revenue'].sum()
-            previous_quarter_revenue = sales_data[sales_data['OrderDate'].dt.to_period('Q') == previous_quarter_period]['Revenue'].sum()
-            if previous_quarter_revenue > 0:
-                qoq_growth = (current_quarter_revenue - previous_quarter_revenue) / previous_quarter_revenue
+    comp_data = get_comparison_data(history, start_date, end_date, comparison_period)
+    delta_revenue, delta_orders = None, None
+    if comp_data is not None and not comp_data.empty:
+        comp_revenue = comp_data['Revenue'].sum()
+        comp_orders = comp_data['Orders'].sum()
+        if comp_revenue > 0:
+            delta_revenue = (main_total_revenue - comp_revenue) / comp_revenue
+        if comp_orders > 0:
+            delta_orders = (main_total_orders - comp_orders) / comp_orders
+
+    # --- KPI Display with Sparklines ---
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        col1.metric("Total Revenue", f"${main_total_revenue:,.2f}", f"{delta_revenue:.2%}" if delta_revenue is not None else None)
+        revenue_spark_data = daily.set_index('OrderDate').resample('D')['Revenue'].sum().reset_index()
+        plotly_chart(create_sparkline(revenue_spark_data, 'Revenue'), "revenue sparkline", use_container_width=True)
 
-        comp_data = get_comparison_data(sales_data, st.session_state.start_date, st.session_state.end_date, comparison_period)
-        delta_revenue, delta_orders = None, None
-        if comp_data is not None and not comp_data.empty:
-            comp_revenue = comp_data['Revenue'].sum()
-            comp_orders = comp_data['OrderID'].nunique()
-            if comp_revenue > 0:
-                delta_revenue = (main_total_revenue - comp_revenue) / comp_revenue
-            if comp_orders > 0:
-                delta_orders = (main_total_orders - comp_orders) / comp_orders
+    with col2:
+        col2.metric("Total Orders", f"{main_total_orders:,}", f"{delta_orders:.2%}" if delta_orders is not None else None)
+        plotly_chart(create_sparkline(daily, 'Orders'), "orders sparkline", use_container_width=True)
 
-        # --- KPI Display with Sparklines ---
-        def create_sparkline(data, y_col, x_col='OrderDate'):
-            fig = go.Figure(go.Scatter(x=data[x_col], y=data[y_col], mode='lines', fill='tozeroy', line_shape='spline'))
-            fig.update_layout(showlegend=False, xaxis_visible=False, yaxis_visible=False, margin=dict(l=0, r=0, t=0, b=0), height=50)
-            return fig
+    with col3:
+        col3.metric("Active Customers", f"{active_customers:,}", help="Distinct customers with at least one order in the selection.")
 
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            col1.metric("Total Revenue", f"${main_total_revenue:,.2f}", f"{delta_revenue:.2%}" if delta_revenue is not None else None)
-            revenue_spark_data = filtered_data.set_index('OrderDate').resample('D')['Revenue'].sum().reset_index()
-            st.plotly_chart(create_sparkline(revenue_spark_data, 'Revenue'), use_container_width=True)
+    with col4:
+        col4.metric("Quarterly Growth", f"{qoq_growth:.2%}", help="Growth of the latest quarter in the selection vs. the preceding quarter.")
 
-        with col2:
-            col2.metric("Total Orders", f"{main_total_orders:,}", f"{delta_orders:.2%}" if delta_orders is not None else None)
-            orders_spark_data = filtered_data.groupby(filtered_data['OrderDate'].dt.date)['OrderID'].nunique().reset_index()
-            st.plotly_chart(create_sparkline(orders_spark_data, 'OrderID'), use_container_width=True)
+st.title("📈 Strategic Overview")
+
+# --- Daily totals for the selection and the full history ---
+# In direct-query mode the database aggregates them; otherwise the order facts do
+daily, history, active_customers = None, None, None
+if use_direct_query():
+    filters = render_direct_sidebar()
+    if filters is not None:
+        daily = query_revenue_trend(filters)
+        history = query_revenue_trend({})
+        kpis = query_kpis(filters)
+        active_customers = kpis['Customers'] if kpis is not None else None
+else:
+    sales_data = run_etl_pipeline()
+    order_facts = load_order_facts()
+    if sales_data is not None and order_facts is not None:
+        filtered_data = render_sidebar(sales_data)
+        filtered_orders = filter_order_facts(order_facts, filtered_data)
+        daily = daily_totals(filtered_orders)
+        history = daily_totals(order_facts)
+        # Order counts are exact (one fact row per order); distinct customers may be sketched
+        if use_approx_distinct_counts():
+            active_customers = approx_distinct_count("customers")
+        else:
+            active_customers = filtered_orders['CustomerID'].nunique()
+
+if daily is not None and history is not None and active_customers is not None:
+    if daily.empty:
+        st.warning("No data available for the selected filters.")
+    else:
+        render_kpis(daily, history, active_customers, st.session_state.start_date, st.session_state.end_date)
 
-        with col3:
-            col3.metric("Quarterly Growth", f"{qoq_growth:.2%}", help="Growth of the latest quarter in the selection vs. the preceding quarter.")
-        
         st.markdown("---")
         st.subheader("Revenue Trend")
-        monthly_revenue = filtered_data.set_index('OrderDate').resample('ME')['Revenue'].sum()
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=monthly_revenue.index, y=monthly_revenue.values, name='Revenue', fill='tozeroy'))
-        st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+        with profile_section("chart: revenue trend"):
+            monthly_revenue = daily.set_index('OrderDate').resample('ME')['Revenue'].sum()
+            fig = go.Figure()
+            fig.add_trace(go.Scatter(x=monthly_revenue.index, y=monthly_revenue.values, name='Revenue', fill='tozeroy'))
+        plotly_chart(fig, "revenue trend", use_container_width=True)
+
+finish_render()
+record_first_render("Strategic Overview")
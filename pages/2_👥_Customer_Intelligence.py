@@ -1,57 +1,80 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-from app.main import run_etl_pipeline
-from app.ui.shared_components import render_sidebar
+from app.startup import record_first_render
+from app.profiling import start_render, finish_render, plotly_chart, profile_section
+from app.ui.charts import plotly_express
+from app.main import run_etl_pipeline, load_order_facts
+from app.ui.shared_components import render_sidebar, filter_order_facts, use_direct_query
+from app.ui.tables import render_paginated_table
+
+@st.fragment
+def render_customer_view(filtered_data, filtered_orders):
+    """Segment overview or a customer's 360° view; picking a customer reruns only this fragment."""
+    px = plotly_express()
+
+    # --- Customer 360° Drill-Down ---
+    customer_list = ["Overview"] + sorted(filtered_data['ContactName'].unique())
+    selected_customer = st.selectbox("Select a Customer for a 360° View", customer_list)
+
+    if selected_customer == "Overview":
+        st.subheader("Customer Segmentation (RFM)")
+        segment_counts = filtered_orders.drop_duplicates(subset=['CustomerID'])['Segment'].value_counts()
+        with profile_section("chart: segments"):
+            fig2 = px.bar(segment_counts, y=segment_counts.index, x=segment_counts.values, orientation='h', 
+                          title="Number of Customers by Segment", labels={'y': 'Segment', 'x': 'Number of Customers'})
+        plotly_chart(fig2, "segments", use_container_width=True)
+
+        with st.expander("About RFM Segmentation"):
+            st.info(
+                """
+                **This chart segments customers based on their purchasing behavior using the RFM model.**
+                - **Champions:** Your best and most loyal customers.
+                - **Loyal Customers:** Consistent buyers.
+                - **Potential Loyalists:** Recent customers with potential.
+                - **At-Risk:** Good customers who haven't purchased in a while.
+                - **Needs Attention:** Customers who are slipping away.
+                - **Hibernating:** Lapsed customers.
+                """
+            )
+    else:
+        st.subheader(f"Customer 360°: {selected_customer}")
+        customer_data = filtered_data[filtered_data['ContactName'] == selected_customer]
+        customer_orders = filtered_orders[filtered_orders['ContactName'] == selected_customer]
+        
+        c_col1, c_col2, c_col3, c_col4 = st.columns(4)
+        c_col1.metric("Lifetime Spend", f"${customer_data['Revenue'].sum():,.2f}")
+        c_col2.metric("Total Orders", f"{len(customer_orders)}")
+        c_col3.metric("RFM Segment", customer_data['Segment'].iloc[0])
+        c_col4.metric("Last Order Date", customer_data['OrderDate'].max().date().strftime("%Y-%m-%d"))
+
+        st.markdown("---")
+        st.subheader("Order History")
+        render_paginated_table(
+            customer_data[['OrderID', 'OrderDate', 'ProductName', 'Quantity', 'Revenue']],
+            key="order_history", sort_by='OrderDate', page_size=25
+        )
 
 st.set_page_config(layout="wide", page_title="Customer Intelligence")
+start_render("Customer Intelligence")
 
 st.title("👥 Customer Intelligence")
 
-sales_data = run_etl_pipeline()
-if sales_data is not None:
+# Segments and order histories are built from line items by the ETL pipeline
+if use_direct_query():
+    st.info("Customer Intelligence needs the in-memory dataset and is not available in direct-query mode (DATA_MODE=direct).")
+    sales_data, order_facts = None, None
+else:
+    sales_data = run_etl_pipeline()
+    order_facts = load_order_facts()
+
+if sales_data is not None and order_facts is not None:
     filtered_data = render_sidebar(sales_data)
+    filtered_orders = filter_order_facts(order_facts, filtered_data)
 
     if filtered_data.empty:
         st.warning("No data available for the selected filters.")
     else:
-        # --- Customer 360° Drill-Down ---
-        customer_list = ["Overview"] + sorted(filtered_data['ContactName'].unique())
-        selected_customer = st.selectbox("Select a Customer for a 360° View", customer_list)
+        render_customer_view(filtered_data, filtered_orders)
 
-        if selected_customer == "Overview":
-            st.subheader("Customer Segmentation (RFM)")
-            segment_counts = filtered_data.drop_duplicates(subset=['CustomerID'])['Segment'].value_counts()
-            fig2 = px.bar(segment_counts, y=segment_counts.index, x=segment_counts.values, orientation='h', 
-                          title="Number of Customers by Segment", labels={'y': 'Segment', 'x': 'Number of Customers'})
-            st.plotly_chart(fig2, use_container_width=True)
-
-            with st.expander("About RFM Segmentation"):
-                st.info(
-                    """
-                    **This chart segments customers based on their purchasing behavior using the RFM model.**
-                    - **Champions:** Your best and most loyal customers.
-                    - **Loyal Customers:** Consistent buyers.
-                    - **Potential Loyalists:** Recent customers with potential.
-                    - **At-Risk:** Good customers who haven't purchased in a while.
-                    - **Needs Attention:** Customers who are slipping away.
-                    - **Hibernating:** Lapsed customers.
-                    """
-                )
-        else:
-            st.subheader(f"Customer 360°: {selected_customer}")
-            customer_data = filtered_data[filtered_data['ContactName'] == selected_customer]
-            
-            c_col1, c_col2, c_col3, c_col4 = st.columns(4)
-            c_col1.metric("Lifetime Spend", f"${customer_data['Revenue'].sum():,.2f}")
-            c_col2.metric("Total Orders", f"{customer_data['OrderID'].nunique()}")
-            c_col3.metric("RFM Segment", customer_data['Segment'].iloc[0])
-            c_col4.metric("Last Order Date", customer_data['OrderDate'].max().date().strftime("%Y-%m-%d"))
-
-            st.markdown("---")
-            st.subheader("Order History")
-            st.dataframe(
-                customer_data[['OrderID', 'OrderDate', 'ProductName', 'Quantity', 'Revenue']].sort_values('OrderDate', ascending=False),
-                hide_index=True,
-                use_container_width=True
-            )
\ No newline at end of file
+finish_render()
+record_first_render("Customer Intelligence")
@@ -1,41 +1,70 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
+from app.startup import record_first_render
+from app.profiling import start_render, finish_render, plotly_chart, profile_section
+from app.ui.charts import plotly_express
 from app.main import run_etl_pipeline
-from app.ui.shared_components import render_sidebar, create_download_button
+from app.aggregation import aggregate
+from app.direct_query import query_product_performance
+from app.ui.shared_components import render_sidebar, create_download_button, use_direct_query, render_direct_sidebar
+from app.ui.tables import render_paginated_table
+
+ORDER_LINE_COLUMNS = [
+    'OrderID', 'OrderDate', 'ContactName', 'Country', 'ProductName', 'CategoryName',
+    'SupplierName', 'UnitPrice', 'Quantity', 'Discount', 'Revenue'
+]
 
 st.set_page_config(layout="wide", page_title="Operational Performance")
+start_render("Operational Performance")
 st.title("⚙️ Operational Performance")
 
-sales_data = run_etl_pipeline()
-if sales_data is not None:
-    filtered_data = render_sidebar(sales_data)
+# --- Product aggregates (from the database in direct-query mode) ---
+product_performance, filtered_data = None, None
+if use_direct_query():
+    filters = render_direct_sidebar()
+    if filters is not None:
+        product_performance = query_product_performance(filters)
+else:
+    sales_data = run_etl_pipeline()
+    if sales_data is not None:
+        filtered_data = render_sidebar(sales_data)
+        with profile_section("aggregate: products"):
+            product_performance = aggregate(filtered_data, ['ProductID', 'ProductName', 'CategoryName'], {
+                'Revenue': ('Revenue', 'sum'), 'Quantity': ('Quantity', 'sum')
+            })
 
-    if filtered_data.empty:
+if product_performance is not None:
+    if product_performance.empty:
         st.warning("No data available for the selected filters.")
     else:
-        st.subheader("Product Performance Matrix")
-        product_performance = filtered_data.groupby(['ProductID', 'ProductName', 'CategoryName']).agg(
-            {'Revenue': 'sum', 'Quantity': 'sum'}
-        ).reset_index()
+        px = plotly_express()
 
-        fig3 = px.scatter(
-            product_performance, 
-            x='Quantity', 
-            y='Revenue', 
-            text='ProductID', 
-            size='Revenue', 
-            color='CategoryName', 
-            hover_name='ProductName',
-            labels={'Quantity': 'Total Quantity Sold', 'Revenue': 'Total Revenue'},
-            title="Revenue vs. Quantity by Product"
-        )
-        fig3.update_traces(textposition='top center', textfont_size=10)
-        st.plotly_chart(fig3, use_container_width=True)
+        st.subheader("Product Performance Matrix")
+        with profile_section("chart: product matrix"):
+            fig3 = px.scatter(
+                product_performance, 
+                x='Quantity', 
+                y='Revenue', 
+                text='ProductID', 
+                size='Revenue', 
+                color='CategoryName', 
+                hover_name='ProductName',
+                labels={'Quantity': 'Total Quantity Sold', 'Revenue': 'Total Revenue'},
+                title="Revenue vs. Quantity by Product"
+            )
+            fig3.update_traces(textposition='top center', textfont_size=10)
+        plotly_chart(fig3, "product matrix", use_container_width=True)
         
         st.subheader("Product Reference")
-        st.dataframe(
-            product_performance.sort_values(by="Revenue", ascending=False),
-            hide_index=True, use_container_width=True
-        )
-        create_download_button(product_performance, "product_performance")
\ No newline at end of file
+        render_paginated_table(product_performance, key="product_reference", sort_by='Revenue')
+        create_download_button(product_performance, "product_performance")
+
+        # Line items never leave the database in direct-query mode
+        if filtered_data is not None:
+            st.subheader("Order Lines")
+            st.caption(f"All {len(filtered_data):,} order lines matching the current filters.")
+            render_paginated_table(filtered_data[ORDER_LINE_COLUMNS], key="order_lines", sort_by='OrderDate')
+            create_download_button(filtered_data, "order_lines")
+
+finish_render()
+record_first_render("Operational Performance")
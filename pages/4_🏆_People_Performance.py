@@ -1,39 +1,66 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-from app.main import run_etl_pipeline
-from app.ui.shared_components import render_sidebar
+from app.startup import record_first_render
+from app.profiling import start_render, finish_render, plotly_chart, profile_section
+from app.ui.charts import plotly_express
+from app.main import run_etl_pipeline, load_order_facts
+from app.aggregation import aggregate
+from app.direct_query import query_employee_leaderboard
+from app.ranking import rank_metrics
+from app.ui.shared_components import (
+    render_sidebar, filter_order_facts, use_direct_query, render_direct_sidebar
+)
 
 st.set_page_config(layout="wide", page_title="People Performance")
+start_render("People Performance")
 st.title("🏆 People Performance")
 
-sales_data = run_etl_pipeline()
-if sales_data is not None:
-    filtered_data = render_sidebar(sales_data)
+# --- Employee aggregates (from the database in direct-query mode) ---
+employee_performance = None
+if use_direct_query():
+    filters = render_direct_sidebar()
+    if filters is not None:
+        employee_performance = query_employee_leaderboard(filters)
+else:
+    sales_data = run_etl_pipeline()
+    order_facts = load_order_facts()
+    if sales_data is not None and order_facts is not None:
+        filtered_data = render_sidebar(sales_data)
+        filtered_orders = filter_order_facts(order_facts, filtered_data)
+        with profile_section("aggregate: employees"):
+            employee_performance = aggregate(filtered_orders, 'EmployeeName', {
+                'Revenue': ('Revenue', 'sum'),
+                'Orders': ('OrderID', 'size')
+            })
 
-    if filtered_data.empty:
+if employee_performance is not None:
+    if employee_performance.empty:
         st.warning("No data available for the selected filters.")
     else:
-        st.subheader("Employee Sales Leaderboard")
+        px = plotly_express()
 
-        employee_performance = filtered_data.groupby('EmployeeName').agg(
-            Revenue=('Revenue', 'sum'),
-            Orders=('OrderID', 'nunique')
-        ).reset_index()
+        st.subheader("Employee Sales Leaderboard")
+        with profile_section("rank: employees"):
+            leaderboard = rank_metrics(employee_performance, 'EmployeeName', ['Revenue', 'Orders'])
 
         p_col1, p_col2 = st.columns(2)
         with p_col1:
             st.subheader("By Revenue")
-            fig_emp_rev = px.bar(
-                employee_performance.sort_values('Revenue', ascending=True),
-                x='Revenue', y='EmployeeName', orientation='h', text_auto='.2s'
-            )
-            st.plotly_chart(fig_emp_rev, use_container_width=True)
+            with profile_section("chart: employee revenue"):
+                fig_emp_rev = px.bar(
+                    leaderboard['Revenue'][::-1],  # Horizontal bars draw bottom-up
+                    x='Revenue', y='EmployeeName', orientation='h', text_auto='.2s'
+                )
+            plotly_chart(fig_emp_rev, "employee revenue", use_container_width=True)
         
         with p_col2:
             st.subheader("By Orders")
-            fig_emp_ord = px.bar(
-                employee_performance.sort_values('Orders', ascending=True),
-                x='Orders', y='EmployeeName', orientation='h', text_auto=True
-            )
-            st.plotly_chart(fig_emp_ord, use_container_width=True)
\ No newline at end of file
+            with profile_section("chart: employee orders"):
+                fig_emp_ord = px.bar(
+                    leaderboard['Orders'][::-1],  # Horizontal bars draw bottom-up
+                    x='Orders', y='EmployeeName', orientation='h', text_auto=True
+                )
+            plotly_chart(fig_emp_ord, "employee orders", use_container_width=True)
+
+finish_render()
+record_first_render("People Performance")
@@ -1,42 +1,61 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
+from app.startup import record_first_render
+from app.profiling import start_render, finish_render, plotly_chart, profile_section
+from app.ui.charts import plotly_express
 from app.main import run_etl_pipeline
-from app.ui.shared_components import render_sidebar
+from app.aggregation import aggregate
+from app.direct_query import query_country_revenue, query_filter_options
+from app.ui.shared_components import render_sidebar, use_direct_query, render_direct_sidebar, select_countries_from_widget
 
 st.set_page_config(layout="wide", page_title="Market Analysis")
+start_render("Market Analysis")
 st.title("🌍 Market Analysis")
 
-sales_data = run_etl_pipeline()
-if sales_data is not None:
-    filtered_data = render_sidebar(sales_data)
+# --- Country aggregates (from the database in direct-query mode) ---
+country_revenue = None
+if use_direct_query():
+    filters = render_direct_sidebar()
+    if filters is not None:
+        country_revenue = query_country_revenue(filters)
+        all_countries = query_filter_options()['countries']
+else:
+    sales_data = run_etl_pipeline()
+    if sales_data is not None:
+        filtered_data = render_sidebar(sales_data)
+        with profile_section("aggregate: countries"):
+            country_revenue = aggregate(filtered_data, ['Country', 'CountryISO3'], {'Revenue': ('Revenue', 'sum')})
+        all_countries = sorted(sales_data['Country'].unique())
 
-    if filtered_data.empty:
+if country_revenue is not None:
+    if country_revenue.empty:
         st.warning("No data available for the selected filters.")
     else:
+        px = plotly_express()
+
         st.subheader("Revenue by Country")
         
         st.info("Click a country on the map, then use the filter below to drill down across the entire dashboard.")
         
-        all_countries = sorted(sales_data['Country'].unique())
-        selected_map_countries = st.multiselect(
+        st.session_state.market_countries = [c for c in st.session_state.selected_countries if c in all_countries]
+        st.multiselect(
             "Filter dashboard by selected countries:",
             options=all_countries,
-            default=st.session_state.selected_countries
+            key='market_countries',
+            on_change=select_countries_from_widget, args=('market_countries',)
         )
-        if selected_map_countries != st.session_state.selected_countries:
-            st.session_state.selected_countries = selected_map_countries
-            st.rerun()
         
-        country_revenue = filtered_data.groupby(['Country', 'CountryISO3'], as_index=False)['Revenue'].sum()
-        
-        fig4 = px.choropleth(
-            country_revenue, 
-            locations='CountryISO3',
-            locationmode='ISO-3',
-            color='Revenue', 
-            hover_name='Country', 
-            color_continuous_scale=px.colors.sequential.Plasma, 
-            title="Geographic Revenue Distribution"
-        )
-        st.plotly_chart(fig4, use_container_width=True)
\ No newline at end of file
+        with profile_section("chart: country map"):
+            fig4 = px.choropleth(
+                country_revenue, 
+                locations='CountryISO3',
+                locationmode='ISO-3',
+                color='Revenue', 
+                hover_name='Country', 
+                color_continuous_scale=px.colors.sequential.Plasma, 
+                title="Geographic Revenue Distribution"
+            )
+        plotly_chart(fig4, "country map", use_container_width=True)
+
+finish_render()
+record_first_render("Market Analysis")
@@ -2,55 +2,115 @@
 Shipping & Logistics Performance Page
 
 This page analyzes the time it takes to ship orders to customers, broken down by
-shipper, country, and employee.
+shipper, country, and employee. All figures come from shipping-day histograms
+built during the ETL (or counted by the database in direct-query mode), so
+filter changes never rescan row-level data.
 """
 import streamlit as st
 import pandas as pd
-import plotly.express as px
+from app.config import Config
+from app.startup import record_first_render
+from app.profiling import start_render, finish_render, plotly_chart, profile_section
+from app.ui.charts import plotly_express
 from app.main import run_etl_pipeline
-from app.ui.shared_components import render_sidebar
+from app.direct_query import query_shipping_histograms
+from app.ui.shared_components import render_sidebar, filter_shipping_histograms, use_direct_query, render_direct_sidebar
 
-st.set_page_config(layout="wide", page_title="Shipping Performance")
-st.title("🚚 Shipping & Logistics Performance")
+QUANTILES = [0.5, 0.9, 0.99]
 
-# --- Load and Filter Data ---
-sales_data = run_etl_pipeline()
-if sales_data is not None:
-    filtered_data = render_sidebar(sales_data)
+@st.fragment
+def render_shipping_analysis(shipping):
+    """SLA slider, KPIs and breakdowns; these controls rerun only this fragment."""
+    px = plotly_express()
+
+    sla_days = st.slider(
+        "SLA target (days)", min_value=1, max_value=Config.SHIPPING_HISTOGRAM_MAX_DAYS - 1,
+        value=Config.SHIPPING_SLA_DAYS,
+        help="Orders shipped in more days than this count as SLA breaches."
+    )
+    overall = shipping.summarize(QUANTILES, sla_days).iloc[0]
 
-    if filtered_data.empty:
-        st.warning("No data available for the selected filters.")
+    if overall['Count'] == 0:
+        st.warning("No shipped orders for the selected filters.")
     else:
-        # --- Data Preparation ---
-        # Calculate shipping time in days, handling potential missing dates
-        df = filtered_data.dropna(subset=['OrderDate', 'ShippedDate']).copy()
-        df['ShippingTime'] = (df['ShippedDate'] - df['OrderDate']).dt.days
-        
-        # Filter out any negative shipping times which indicate data errors
-        df = df[df['ShippingTime'] >= 0]
-
-        # --- KPI Card ---
-        avg_shipping_time = df['ShippingTime'].mean()
-        st.metric("Average Shipping Time", f"{avg_shipping_time:.2f} Days")
+        # --- KPI Cards ---
+        k_col1, k_col2, k_col3, k_col4, k_col5 = st.columns(5)
+        k_col1.metric("Average Shipping Time", f"{overall['Mean']:.2f} Days")
+        k_col2.metric("Median (p50)", f"{overall['p50']:.0f} Days")
+        k_col3.metric("p90", f"{overall['p90']:.0f} Days")
+        k_col4.metric("p99", f"{overall['p99']:.0f} Days")
+        k_col5.metric("SLA Breach Rate", f"{overall['ExceedanceRate']:.1%}", help=f"Share of orders shipped in more than {sla_days} days.")
         st.markdown("---")
 
-        # --- Visualizations ---
+        # --- Distribution ---
+        st.subheader("Shipping Time Distribution")
+        distribution = pd.DataFrame({
+            'ShippingTime': range(shipping.max_value + 1),
+            'Orders': shipping.counts.sum(axis=0)
+        })
+        distribution = distribution[distribution['Orders'] > 0]
+        with profile_section("chart: shipping distribution"):
+            fig_dist = px.bar(
+                distribution, x='ShippingTime', y='Orders',
+                labels={'ShippingTime': 'Shipping Time (Days)', 'Orders': 'Number of Orders'}
+            )
+            fig_dist.add_vline(x=sla_days + 0.5, line_dash='dash', annotation_text='SLA')
+        plotly_chart(fig_dist, "shipping distribution", use_container_width=True)
+
+        # --- Breakdown by Dimension ---
+        dimensions = {'Country': 'Country', 'Employee': 'EmployeeName', 'Shipper': 'ShipperName'}
+        selected_dimension = st.radio("Break down by", list(dimensions.keys()), horizontal=True)
+        dimension_col = dimensions[selected_dimension]
+        breakdown = shipping.summarize(QUANTILES, sla_days, by=dimension_col).reset_index()
+
         col1, col2 = st.columns(2)
-        
         with col1:
-            st.subheader("Avg. Shipping Time by Country")
-            country_shipping = df.groupby('Country')['ShippingTime'].mean().reset_index().sort_values('ShippingTime')
-            fig_country = px.bar(
-                country_shipping, x='ShippingTime', y='Country', orientation='h',
-                labels={'ShippingTime': 'Average Shipping Time (Days)'}
+            st.subheader(f"Shipping Time by {selected_dimension}")
+            percentiles = breakdown.sort_values('Mean').melt(
+                id_vars=dimension_col, value_vars=['Mean', 'p50', 'p90', 'p99'],
+                var_name='Statistic', value_name='ShippingTime'
             )
-            st.plotly_chart(fig_country, use_container_width=True)
+            with profile_section("chart: shipping percentiles"):
+                fig_pct = px.bar(
+                    percentiles, x='ShippingTime', y=dimension_col, color='Statistic',
+                    barmode='group', orientation='h',
+                    labels={'ShippingTime': 'Shipping Time (Days)', dimension_col: selected_dimension}
+                )
+            plotly_chart(fig_pct, "shipping percentiles", use_container_width=True)
 
         with col2:
-            st.subheader("Avg. Shipping Time by Employee")
-            employee_shipping = df.groupby('EmployeeName')['ShippingTime'].mean().reset_index().sort_values('ShippingTime')
-            fig_employee = px.bar(
-                employee_shipping, x='ShippingTime', y='EmployeeName', orientation='h',
-                labels={'ShippingTime': 'Average Shipping Time (Days)'}
-            )
-            st.plotly_chart(fig_employee, use_container_width=True)
\ No newline at end of file
+            st.subheader(f"SLA Breach Rate by {selected_dimension}")
+            with profile_section("chart: sla breach rate"):
+                fig_sla = px.bar(
+                    breakdown.sort_values('ExceedanceRate'), x='ExceedanceRate', y=dimension_col, orientation='h',
+                    labels={'ExceedanceRate': f'Share Shipped in More Than {sla_days} Days', dimension_col: selected_dimension}
+                )
+                fig_sla.update_xaxes(tickformat='.0%')
+            plotly_chart(fig_sla, "sla breach rate", use_container_width=True)
+
+st.set_page_config(layout="wide", page_title="Shipping Performance")
+start_render("Shipping Performance")
+st.title("🚚 Shipping & Logistics Performance")
+
+# --- Load and Filter Data ---
+# Histograms of shipping days for the selected cells (unshipped orders and
+# negative shipping times, which indicate data errors, are excluded)
+shipping = None
+if use_direct_query():
+    filters = render_direct_sidebar()
+    if filters is not None:
+        shipping = query_shipping_histograms(filters)
+else:
+    sales_data = run_etl_pipeline()
+    if sales_data is not None:
+        filtered_data = render_sidebar(sales_data)
+        if not filtered_data.empty:
+            shipping = filter_shipping_histograms(filtered_data)
+        else:
+            st.warning("No data available for the selected filters.")
+
+if shipping is not None:
+    render_shipping_analysis(shipping)
+
+finish_render()
+record_first_render("Shipping Performance")
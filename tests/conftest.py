@@ -41,3 +41,8 @@ def sample_employees_df() -> pd.DataFrame:
 def sample_suppliers_df() -> pd.DataFrame:
     data = {'SupplierID': [5, 6], 'CompanyName': ['Cooperativa de Quesos', 'Mayumi\'s']}
     return pd.DataFrame(data)
+
+@pytest.fixture(scope="session")
+def sample_shippers_df() -> pd.DataFrame:
+    data = {'ShipperID': [1, 3], 'CompanyName': ['Speedy Express', 'Federal Shipping']}
+    return pd.DataFrame(data)
@@ -0,0 +1,57 @@
+"""
+Unit tests for the sharded aggregation engine.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from app import aggregation
+from app.aggregation import aggregate
+
+AGGREGATIONS = {
+    'Revenue': ('Revenue', 'sum'),
+    'Lines': ('OrderID', 'size'),
+    'Priced': ('Discount', 'count'),
+    'First': ('OrderDate', 'min'),
+    'Last': ('OrderDate', 'max'),
+    'Orders': ('OrderID', 'nunique'),
+    'Products': ('ProductID', 'nunique'),
+}
+
+@pytest.fixture
+def lines_df() -> pd.DataFrame:
+    rng = np.random.default_rng(1)
+    n = 5_000
+    df = pd.DataFrame({
+        'CustomerID': rng.choice([f'C{i:03d}' for i in range(60)], n),
+        'SupplierName': rng.choice(['Exotic Liquids', 'Tokyo Traders', 'Pavlova, Ltd.', None], n),
+        'OrderID': rng.integers(10248, 11000, n),
+        'ProductID': rng.integers(1, 78, n).astype(float),
+        'OrderDate': pd.Timestamp('1996-07-04') + pd.to_timedelta(rng.integers(0, 670, n), unit='D'),
+        'Revenue': rng.uniform(5, 500, n),
+        'Discount': rng.choice([0.0, 0.05, np.nan], n),
+    })
+    df.loc[df['SupplierName'] == 'Pavlova, Ltd.', 'ProductID'] = np.nan  # A group with no distinct values
+    return df.sort_values('OrderDate', kind='stable', ignore_index=True)
+
+@pytest.fixture(autouse=True)
+def small_shards(monkeypatch):
+    monkeypatch.setattr(aggregation, "MIN_SHARD_ROWS", 100)
+
+def test_row_range_shards_match_serial_groupby(lines_df):
+    expected = lines_df.groupby(['SupplierName', 'CustomerID']).agg(**AGGREGATIONS).reset_index()
+    result = aggregate(lines_df, ['SupplierName', 'CustomerID'], AGGREGATIONS, workers=7)
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+def test_key_shards_match_serial_groupby(lines_df):
+    expected = lines_df.groupby('CustomerID').agg(**AGGREGATIONS).reset_index()
+    result = aggregate(lines_df, 'CustomerID', AGGREGATIONS, shard_key='CustomerID', workers=4)
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+def test_small_frames_and_invalid_arguments(lines_df):
+    expected = lines_df.head(50).groupby('SupplierName').agg(**AGGREGATIONS).reset_index()
+    pd.testing.assert_frame_equal(aggregate(lines_df.head(50), 'SupplierName', AGGREGATIONS, workers=4), expected)
+
+    with pytest.raises(ValueError):
+        aggregate(lines_df, 'CustomerID', {'Median': ('Revenue', 'median')})
+    with pytest.raises(ValueError):
+        aggregate(lines_df, 'CustomerID', AGGREGATIONS, shard_key='SupplierName')
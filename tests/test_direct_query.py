@@ -0,0 +1,95 @@
+"""
+Tests for direct-query mode against a SQLite copy of docs/instnwnd.sql.
+
+The same database feeds both the in-memory ETL pipeline and the SQL
+aggregates, so every direct query must match its pandas counterpart.
+"""
+from datetime import date
+
+import pandas as pd
+import pytest
+import streamlit as st
+
+from app import direct_query
+from app.config import Config
+from app.etl.northwind_sqlite import create_northwind_sqlite
+from app.main import build_sales_data, build_shipping_histograms
+from app.etl.transform import create_order_facts
+
+FILTERS = {
+    "start_date": date(1997, 1, 1),
+    "end_date": date(1997, 12, 31),
+    "countries": ("Germany", "USA", "France"),
+    "categories": ("Beverages", "Seafood"),
+}
+
+@pytest.fixture(scope="module")
+def northwind_url(tmp_path_factory):
+    return create_northwind_sqlite(str(tmp_path_factory.mktemp("northwind") / "northwind.db"))
+
+@pytest.fixture
+def direct_db(northwind_url, monkeypatch):
+    monkeypatch.setattr(Config, "DB_URL", northwind_url)
+    monkeypatch.setattr(Config, "DATA_SOURCE", "database")
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    yield
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+@pytest.fixture
+def filtered_sales(direct_db):
+    sales_data = build_sales_data()
+    return sales_data[
+        (sales_data['OrderDate'] >= pd.Timestamp(FILTERS['start_date'])) &
+        (sales_data['OrderDate'] <= pd.Timestamp(FILTERS['end_date'])) &
+        (sales_data['Country'].isin(FILTERS['countries'])) &
+        (sales_data['CategoryName'].isin(FILTERS['categories']))
+    ]
+
+def test_sqlite_copy_has_all_northwind_rows(direct_db):
+    counts = direct_query.run_query(
+        'SELECT (SELECT COUNT(*) FROM Orders) AS Orders, (SELECT COUNT(*) FROM [Order Details]) AS Lines,'
+        ' (SELECT COUNT(*) FROM Customers) AS Customers'
+    ).iloc[0]
+    assert (counts['Orders'], counts['Lines'], counts['Customers']) == (830, 2155, 91)
+
+def test_kpis_and_trend_match_pandas(filtered_sales):
+    kpis = direct_query.query_kpis(FILTERS)
+    assert kpis['Revenue'] == pytest.approx(filtered_sales['Revenue'].sum())
+    assert kpis['Orders'] == filtered_sales['OrderID'].nunique()
+    assert kpis['Customers'] == filtered_sales['CustomerID'].nunique()
+
+    trend = direct_query.query_revenue_trend(FILTERS)
+    expected = filtered_sales.groupby('OrderDate')['Revenue'].sum()
+    assert list(trend['OrderDate']) == list(expected.index)
+    assert trend['Revenue'].to_numpy() == pytest.approx(expected.to_numpy())
+
+def test_page_aggregates_match_pandas(filtered_sales):
+    products = direct_query.query_product_performance(FILTERS).set_index('ProductID').sort_index()
+    expected = filtered_sales.groupby('ProductID').agg(Revenue=('Revenue', 'sum'), Quantity=('Quantity', 'sum'))
+    assert products['Revenue'].to_numpy() == pytest.approx(expected['Revenue'].to_numpy())
+    assert (products['Quantity'].to_numpy() == expected['Quantity'].to_numpy()).all()
+
+    employees = direct_query.query_employee_leaderboard(FILTERS).set_index('EmployeeName').sort_index()
+    assert employees['Orders'].to_dict() == filtered_sales.groupby('EmployeeName')['OrderID'].nunique().to_dict()
+
+    countries = direct_query.query_country_revenue(FILTERS).set_index('Country').sort_index()
+    assert countries['CountryISO3'].to_dict() == {'France': 'FRA', 'Germany': 'DEU', 'USA': 'USA'}
+    assert countries['Revenue'].to_numpy() == pytest.approx(filtered_sales.groupby('Country')['Revenue'].sum().to_numpy())
+
+    suppliers = direct_query.query_supplier_stats(FILTERS).set_index('SupplierName').sort_index()
+    assert suppliers['Products'].to_dict() == filtered_sales.groupby('SupplierName')['ProductID'].nunique().to_dict()
+
+def test_shipping_histograms_match_pandas(filtered_sales):
+    summary = direct_query.query_shipping_histograms(FILTERS).summarize([0.5, 0.9], 7, by='ShipperName')
+    expected = build_shipping_histograms(create_order_facts(filtered_sales)).summarize([0.5, 0.9], 7, by='ShipperName')
+    pd.testing.assert_frame_equal(summary, expected, check_dtype=False)
+
+def test_unfiltered_and_empty_selections(direct_db):
+    options = direct_query.query_filter_options()
+    assert options['first_order'] == date(1996, 7, 4)
+    assert len(options['countries']) == 21 and len(options['categories']) == 8
+
+    assert direct_query.query_kpis({})['Orders'] == 830
+    assert direct_query.query_kpis({"countries": ()}) == {"Revenue": 0.0, "Orders": 0, "Customers": 0}
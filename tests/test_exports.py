@@ -0,0 +1,61 @@
+"""
+Unit tests for the DataFrame export module.
+"""
+import io
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from app import exports
+from app.config import Config
+from app.exports import dataframe_fingerprint, export_dataframe, serialize_dataframe
+
+@pytest.fixture
+def export_df() -> pd.DataFrame:
+    return pd.DataFrame({
+        'OrderID': [10248, 10248, 10249, 10250, 10251],
+        'ProductName': ['Queso Cabrales', 'Tofu', 'Chai', 'Chang', 'Ikura'],
+        'OrderDate': pd.to_datetime(['1996-07-04', '1996-07-04', '1996-07-05', '1996-07-08', '1996-07-08']),
+        'Revenue': [168.0, 150.66, 72.0, 95.0, 310.0],
+    })
+
+def test_csv_export_is_identical_across_chunk_sizes(export_df):
+    """Chunked CSV output must match a single-shot to_csv, with one header row."""
+    expected = export_df.to_csv(index=False).encode('utf-8')
+    assert serialize_dataframe(export_df, 'csv', chunk_size=2) == expected
+    assert serialize_dataframe(export_df, 'csv', chunk_size=100) == expected
+
+def test_parquet_and_arrow_exports_round_trip(export_df):
+    """Binary exports must read back to the original frame."""
+    parquet_bytes = serialize_dataframe(export_df, 'parquet', chunk_size=2)
+    assert pq.ParquetFile(io.BytesIO(parquet_bytes)).num_row_groups == 3
+    pd.testing.assert_frame_equal(pq.read_table(io.BytesIO(parquet_bytes)).to_pandas(), export_df)
+
+    arrow_bytes = serialize_dataframe(export_df, 'arrow', chunk_size=2)
+    pd.testing.assert_frame_equal(pa.ipc.open_stream(arrow_bytes).read_pandas(), export_df)
+
+def test_unsupported_format_raises(export_df):
+    with pytest.raises(ValueError):
+        serialize_dataframe(export_df, 'xlsx')
+
+def test_fingerprint_tracks_content_not_index(export_df):
+    """Equal content hashes equally; any changed value changes the hash."""
+    reindexed = export_df.set_axis(range(100, 105))
+    assert dataframe_fingerprint(export_df) == dataframe_fingerprint(reindexed)
+
+    changed = export_df.copy()
+    changed.loc[0, 'Revenue'] = 0.0
+    assert dataframe_fingerprint(export_df) != dataframe_fingerprint(changed)
+
+def test_export_cache_is_bounded_by_size(export_df, monkeypatch):
+    """Least recently used files are evicted once the cache exceeds its size."""
+    monkeypatch.setattr(exports, "_EXPORT_CACHE", exports.OrderedDict())
+    first = export_dataframe(export_df, 'csv')
+    monkeypatch.setattr(Config, "EXPORT_CACHE_MAX_MB", len(first) * 1.5 / 2**20)
+
+    assert export_dataframe(export_df, 'csv') == first
+    export_dataframe(export_df.head(4), 'csv')
+    assert list(exports._EXPORT_CACHE) == [(dataframe_fingerprint(export_df.head(4)), 'csv')]
+
+    export_dataframe(export_df, 'parquet')  # Larger than the whole cache: served, not kept
+    assert len(exports._EXPORT_CACHE) == 1
@@ -0,0 +1,93 @@
+"""
+Unit tests for the snapshot persistence in the load module.
+"""
+import os
+import time
+import numpy as np
+import pandas as pd
+from app.config import Config
+from app.etl.load import (
+    PARTITION_PREFIX, SNAPSHOT_DATASET, SUCCESS_MARKER, load_snapshot, save_snapshot, select_date_range
+)
+from app.etl.transform import create_order_facts
+from app.main import build_sales_data, build_shipping_histograms, refresh_cutoff
+
+def _sales_df() -> pd.DataFrame:
+    return pd.DataFrame({
+        'OrderID': [10248, 10249, 10300, 10301],
+        'OrderDate': pd.to_datetime(['1996-07-04', '1996-07-05', '1996-09-09', '1996-09-09']),
+        'CustomerID': ['VINET', 'TOMSP', 'VINET', 'MAGAA'],
+        'Revenue': [168.0, 150.66, 608.0, 159.0],
+        'Segment': ['Champions', 'At-Risk', 'Champions', 'Hibernating'],
+    })
+
+def test_snapshot_round_trip(tmp_path):
+    df = _sales_df()
+    assert save_snapshot(df, str(tmp_path))
+    partitions = sorted(os.listdir(tmp_path / SNAPSHOT_DATASET))
+    assert partitions == [f"{PARTITION_PREFIX}1996-07", f"{PARTITION_PREFIX}1996-09"]
+    pd.testing.assert_frame_equal(load_snapshot(str(tmp_path), max_age_seconds=60), df)
+
+def test_stale_or_disabled_snapshot_is_ignored(tmp_path):
+    df = _sales_df()
+    save_snapshot(df, str(tmp_path))
+    stale = time.time() - 7200
+    os.utime(tmp_path / SUCCESS_MARKER, (stale, stale))
+
+    assert load_snapshot(str(tmp_path), max_age_seconds=3600) is None
+    assert load_snapshot(str(tmp_path), max_age_seconds=None) is not None
+    assert load_snapshot("", max_age_seconds=3600) is None
+    assert not save_snapshot(df, "")
+
+def test_incremental_save_rewrites_only_recent_partitions(tmp_path):
+    df = _sales_df()
+    save_snapshot(df, str(tmp_path))
+    closed = tmp_path / SNAPSHOT_DATASET / f"{PARTITION_PREFIX}1996-07" / "part-0.parquet"
+    old = time.time() - 600
+    os.utime(closed, (old, old))
+
+    df.loc[df['OrderID'] == 10301, 'Revenue'] = 200.0
+    assert save_snapshot(df, str(tmp_path), since=pd.Timestamp('1996-09-01'))
+    assert os.path.getmtime(closed) == old
+    pd.testing.assert_frame_equal(load_snapshot(str(tmp_path), max_age_seconds=60), df)
+
+def test_incremental_save_removes_months_that_disappeared(tmp_path):
+    df = _sales_df()
+    save_snapshot(df, str(tmp_path))
+
+    df = df[df['OrderDate'] < '1996-09-01']  # Every September order was deleted
+    assert save_snapshot(df, str(tmp_path), since=pd.Timestamp('1996-09-01'))
+    assert sorted(os.listdir(tmp_path / SNAPSHOT_DATASET)) == [f"{PARTITION_PREFIX}1996-07"]
+    pd.testing.assert_frame_equal(load_snapshot(str(tmp_path), max_age_seconds=60), df)
+
+def test_select_date_range_matches_mask():
+    df = _sales_df()
+    selected = select_date_range(df, pd.Timestamp('1996-07-05').date(), pd.Timestamp('1996-09-09').date())
+    assert list(selected['OrderID']) == [10249, 10300, 10301]
+    assert select_date_range(df, pd.Timestamp('1996-08-01').date(), pd.Timestamp('1996-08-31').date()).empty
+
+def test_incremental_refresh_equals_full_build(monkeypatch):
+    monkeypatch.setattr(Config, "DATA_SOURCE", "synthetic")
+    monkeypatch.setattr(Config, "SYNTHETIC_ORDERS", 400)
+    full = build_sales_data()
+    assert full['OrderDate'].is_monotonic_increasing
+
+    since = refresh_cutoff(full)
+    history = full[full['OrderDate'] < since]
+    refreshed = build_sales_data(since=since, history=history)
+    pd.testing.assert_frame_equal(refreshed, full)
+
+def test_incremental_histograms_equal_a_full_build(monkeypatch):
+    """Orders that shipped since the last refresh replace their months' histograms."""
+    monkeypatch.setattr(Config, "DATA_SOURCE", "synthetic")
+    monkeypatch.setattr(Config, "SYNTHETIC_ORDERS", 400)
+    order_facts = create_order_facts(build_sales_data())
+    since = order_facts['OrderDate'].max().to_period('M').start_time - pd.DateOffset(months=2)
+    before = order_facts.copy()
+    before.loc[before['OrderDate'] >= since, 'ShippingDays'] = np.nan  # Not shipped yet
+
+    refreshed = build_shipping_histograms(order_facts, previous=build_shipping_histograms(before), since=since)
+    full = build_shipping_histograms(order_facts)
+    pd.testing.assert_frame_equal(refreshed.cells, full.cells)
+    np.testing.assert_array_equal(refreshed.counts, full.counts)
+    np.testing.assert_array_equal(refreshed.sums, full.sums)
@@ -0,0 +1,9 @@
+from app.loadtest import run_load_test
+
+def test_load_test_drives_all_pages_without_errors():
+    report = run_load_test(sessions=2, iterations=3, n_orders=500, seed=1)
+    assert report["errors"] == []
+    assert report["pages"] == 7
+    assert report["renders"] == 2 * (1 + 2 * 3)
+    assert 0 < report["p50_ms"] <= report["p99_ms"] <= report["max_ms"]
+    assert report["throughput_rps"] > 0
@@ -0,0 +1,53 @@
+"""
+Tests for the per-rerun render profiler.
+"""
+from streamlit.testing.v1 import AppTest
+from app.config import Config
+from app.profiling import profile_section, summarize_profiles
+
+def _profiled_page():
+    import streamlit as st
+    from app.profiling import finish_render, profile_section, profiled_cache, start_render
+
+    @profiled_cache(st.cache_data)
+    def load_numbers(n):
+        return list(range(n))
+
+    start_render("Test Page")
+    with profile_section("fetch"):
+        load_numbers(3)
+        load_numbers(3)
+        load_numbers(4)
+    finish_render()
+
+def test_reruns_record_sections_and_cache_hits(monkeypatch, tmp_path):
+    log_path = tmp_path / "profiles.jsonl"
+    monkeypatch.setattr(Config, "PROFILE_RENDERS", True)
+    monkeypatch.setattr(Config, "PROFILE_LOG_PATH", str(log_path))
+
+    at = AppTest.from_function(_profiled_page).run()
+    assert not at.exception
+    sections, cache, _ = at.expander[0].dataframe
+    assert list(sections.value['Section']) == ["· cache: load_numbers"] * 3 + ["fetch"]
+    assert cache.value.to_dict('records') == [{"Function": "load_numbers", "hits": 1, "misses": 2}]
+
+    at.run()
+    assert len(log_path.read_text().splitlines()) == 2
+
+def test_profiler_is_a_no_op_outside_script_runs(monkeypatch):
+    monkeypatch.setattr(Config, "PROFILE_RENDERS", True)
+    with profile_section("outside a script run"):
+        pass
+
+def test_summary_ranks_sections_by_total_time():
+    records = [
+        {"page": "Overview", "total_s": 0.5, "sections": [{"name": "filter", "depth": 0, "seconds": 0.1}],
+         "cache": {}, "charts": [{"name": "trend", "bytes": 2048, "seconds": 0.02}]},
+        {"page": "Overview", "total_s": 0.3, "sections": [{"name": "filter", "depth": 0, "seconds": 0.3}],
+         "cache": {}, "charts": []},
+    ]
+    summary = summarize_profiles(records).set_index('section')
+    assert list(summary.index) == ["(total)", "filter", "send: trend"]
+    assert summary.loc["filter", "reruns"] == 2
+    assert summary.loc["filter", "p50_ms"] == 200.0
+    assert summary.loc["send: trend", "avg_kb"] == 2.0
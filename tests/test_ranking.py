@@ -0,0 +1,41 @@
+"""
+Unit tests for the shared top-N ranking.
+"""
+import numpy as np
+import pandas as pd
+from app.ranking import rank_metrics, top_n, top_n_positions
+
+def _suppliers_df() -> pd.DataFrame:
+    return pd.DataFrame({
+        'SupplierName': ['Exotic Liquids', 'Tokyo Traders', 'Pavlova, Ltd.', 'Ma Maison', 'Karkki Oy', 'Formaggi Fortini'],
+        'Revenue': [300.0, 500.0, 500.0, np.nan, 120.0, 80.0],
+        'Products': [3, 3, 5, 2, 3, 1],
+    })
+
+def test_top_n_matches_a_stable_sort_with_missing_values_last():
+    rng = np.random.default_rng(7)
+    values = pd.Series(rng.integers(0, 50, 1000).astype(float))
+    values[rng.choice(1000, 30, replace=False)] = np.nan
+    for ascending in (False, True):
+        expected = values.sort_values(ascending=ascending, kind='stable', na_position='last').index.to_numpy()
+        for n in (1, 10, 990, 2000, None):
+            assert list(top_n_positions(values, n, ascending)) == list(expected[:n])
+
+    labels = pd.Series(['b', None, 'a', 'b', 'c'], index=[10, 11, 12, 13, 14])  # Text falls back to a stable sort
+    assert list(top_n_positions(labels, ascending=True)) == [2, 0, 3, 4, 1]
+    assert list(top_n_positions(labels, 2)) == [4, 0]
+
+def test_ties_keep_row_order_and_other_sums_the_rest():
+    df = _suppliers_df()
+    top = top_n(df, 'Revenue', 2)
+    assert list(top['SupplierName']) == ['Tokyo Traders', 'Pavlova, Ltd.']
+
+    with_other = top_n(df, 'Revenue', 2, other_label_col='SupplierName')
+    assert list(with_other['SupplierName']) == ['Tokyo Traders', 'Pavlova, Ltd.', 'Other']
+    assert with_other['Revenue'].iloc[-1] == 500.0  # Missing revenue counts as zero
+    assert list(top_n(df, 'Revenue', 10, other_label_col='SupplierName')['SupplierName'])[-1] == 'Ma Maison'
+
+def test_rank_metrics_ranks_the_same_entities_by_every_metric():
+    ranked = rank_metrics(_suppliers_df(), 'SupplierName', ['Revenue', 'Products'], n=3, group_other=True)
+    assert list(ranked['Products']['SupplierName']) == ['Pavlova, Ltd.', 'Exotic Liquids', 'Tokyo Traders', 'Other']
+    assert ranked['Products']['Products'].iloc[-1] == 6
@@ -0,0 +1,107 @@
+"""
+Tests for the per-table refresh policies, against a SQLite copy of docs/instnwnd.sql.
+"""
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+import streamlit as st
+
+from app.config import Config
+from app.etl import refresh
+from app.etl.load import SUCCESS_MARKER, load_snapshot
+from app.etl.northwind_sqlite import create_northwind_sqlite
+from app.main import (
+    build_sales_data, build_shipping_histograms, extract_tables, load_order_facts, load_shipping_histograms,
+    refresh_sales_data, run_etl_pipeline
+)
+
+@pytest.fixture
+def northwind_db(tmp_path, monkeypatch):
+    db_path = tmp_path / "northwind.db"
+    monkeypatch.setattr(Config, "DB_URL", create_northwind_sqlite(str(db_path)))
+    monkeypatch.setattr(Config, "DATA_SOURCE", "database")
+    refresh.clear_table_store()
+    yield db_path
+    refresh.clear_table_store()
+
+def _expire(policies, monkeypatch):
+    for policy in policies:
+        monkeypatch.setitem(policy, "ttl_seconds", 0)
+
+def test_tables_within_ttl_are_not_queried(northwind_db, monkeypatch):
+    first = extract_tables()
+    queries = []
+    monkeypatch.setattr(refresh, "extract_data", lambda *args, **kwargs: queries.append(args))
+
+    second = extract_tables()
+    assert queries == []
+    pd.testing.assert_frame_equal(second["orders"], first["orders"])
+
+def test_probes_skip_unchanged_tables(northwind_db, monkeypatch, caplog):
+    extract_tables()
+    _expire([refresh._FACTS, refresh._DIMENSIONS], monkeypatch)
+    with sqlite3.connect(northwind_db) as connection:
+        connection.execute("INSERT INTO Shippers (CompanyName, Phone) VALUES ('Fast Freight', '(503) 555-0199')")
+
+    with caplog.at_level("INFO"):
+        dataframes = extract_tables()
+    assert "shippers=extracted" in caplog.text
+    assert "orders=unchanged" in caplog.text and "products=unchanged" in caplog.text
+    assert len(dataframes["shippers"]) == 4
+
+def test_unchanged_database_reuses_the_last_build(northwind_db, monkeypatch):
+    first = build_sales_data()
+    _expire([refresh._FACTS], monkeypatch)
+    generation = refresh.extraction_generation()
+
+    second = build_sales_data()
+    assert refresh.extraction_generation() == generation
+    pd.testing.assert_frame_equal(second, first)
+
+def _refresh_now():
+    """Refreshes the sales data as if the fact refresh interval had passed."""
+    st.cache_resource.clear()
+    return run_etl_pipeline()
+
+def test_refresh_picks_up_an_old_order_shipped_later(northwind_db, tmp_path, monkeypatch, caplog):
+    """An order still unshipped at the last refresh is re-extracted once it ships, however old."""
+    with sqlite3.connect(northwind_db) as connection:
+        connection.execute("UPDATE Orders SET ShippedDate = NULL WHERE OrderID = 10248")
+    snapshot_dir = str(tmp_path / "snapshot")
+    monkeypatch.setattr(Config, "DATA_SNAPSHOT_DIR", snapshot_dir)
+    assert _refresh_now().loc[lambda df: df['OrderID'] == 10248, 'ShippedDate'].isna().all()
+    load_shipping_histograms()
+
+    with sqlite3.connect(northwind_db) as connection:
+        connection.execute("UPDATE Orders SET ShippedDate = '1996-07-16 00:00:00' WHERE OrderID = 10248")
+    refreshed = _refresh_now()
+
+    shipped = refreshed.loc[refreshed['OrderID'] == 10248, 'ShippedDate']
+    assert (shipped == pd.Timestamp('1996-07-16')).all()
+    pd.testing.assert_frame_equal(load_snapshot(snapshot_dir, max_age_seconds=None), refreshed)
+
+    # The histograms of the refreshed months are folded into the previous ones
+    with caplog.at_level("INFO"):
+        histograms = load_shipping_histograms()
+    assert "Building shipping-time histograms from 1996-07-01" in caplog.text
+    np.testing.assert_array_equal(histograms.counts, build_shipping_histograms(load_order_facts()).counts)
+
+    pd.testing.assert_frame_equal(refreshed, build_sales_data())
+
+def test_unchanged_database_keeps_the_data_version(northwind_db, tmp_path, monkeypatch):
+    """Without changed tables a refresh rebuilds nothing and leaves the snapshot alone."""
+    monkeypatch.setattr(Config, "DATA_SNAPSHOT_DIR", str(tmp_path / "snapshot"))
+    _refresh_now()
+    _expire([refresh._FACTS, refresh._DIMENSIONS], monkeypatch)
+    _refresh_now()  # The first incremental refresh extracts the recent orders once
+    version = refresh_sales_data()
+    marker_mtime = os.path.getmtime(tmp_path / "snapshot" / SUCCESS_MARKER)
+    order_facts = load_order_facts()
+
+    st.cache_resource.clear()
+    assert refresh_sales_data() == version
+    assert os.path.getmtime(tmp_path / "snapshot" / SUCCESS_MARKER) == marker_mtime
+    pd.testing.assert_frame_equal(load_order_facts(), order_facts)
@@ -0,0 +1,123 @@
+"""
+Unit tests for the HyperLogLog distinct-count sketches.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from app.sketches import DistinctCountCube, HistogramCube, hll_relative_error
+
+@pytest.fixture(scope="module")
+def order_lines_df() -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    n = 200_000
+    return pd.DataFrame({
+        'OrderID': rng.integers(0, 60_000, n),
+        'Country': rng.choice(['Germany', 'France', 'USA', 'Brazil'], n),
+        'CategoryName': rng.choice(['Beverages', 'Seafood', 'Produce'], n),
+    })
+
+def test_small_cardinalities_are_exact():
+    """Linear counting makes small distinct counts effectively exact."""
+    df = pd.DataFrame({
+        'OrderID': [10248, 10249, 10250, 10248, 10249],
+        'Country': ['France', 'Germany', 'France', 'France', 'Germany'],
+    })
+    cube = DistinctCountCube.build(df, 'OrderID', ['Country'])
+    assert cube.count() == 3
+    assert cube.count(by='Country').to_dict() == {'France': 2, 'Germany': 1}
+
+def test_cube_counts_are_within_error_bound(order_lines_df):
+    """Estimates for any cell selection stay within three standard errors."""
+    cube = DistinctCountCube.build(order_lines_df, 'OrderID', ['Country', 'CategoryName'], precision=12)
+    tolerance = 3 * hll_relative_error(12)
+
+    exact_total = order_lines_df['OrderID'].nunique()
+    assert cube.count() == pytest.approx(exact_total, rel=tolerance)
+
+    mask = cube.cells['Country'].isin(['Germany', 'USA']) & (cube.cells['CategoryName'] != 'Seafood')
+    selected = order_lines_df[
+        order_lines_df['Country'].isin(['Germany', 'USA']) & (order_lines_df['CategoryName'] != 'Seafood')
+    ]
+    assert cube.count(mask.to_numpy()) == pytest.approx(selected['OrderID'].nunique(), rel=tolerance)
+
+    by_country = cube.count(by='Country')
+    exact_by_country = order_lines_df.groupby('Country')['OrderID'].nunique()
+    for country, exact in exact_by_country.items():
+        assert by_country[country] == pytest.approx(exact, rel=tolerance)
+
+def test_merge_equals_building_from_all_rows(order_lines_df):
+    """Merging sketches of two batches is identical to sketching the union."""
+    dims = ['Country', 'CategoryName']
+    full = DistinctCountCube.build(order_lines_df, 'OrderID', dims)
+    merged = DistinctCountCube.build(order_lines_df.iloc[:120_000], 'OrderID', dims).merge(
+        DistinctCountCube.build(order_lines_df.iloc[120_000:], 'OrderID', dims)
+    )
+    pd.testing.assert_frame_equal(merged.cells, full.cells)
+    for attribute in ('cell_codes', 'slots', 'ranks'):
+        np.testing.assert_array_equal(getattr(merged, attribute), getattr(full, attribute))
+
+def test_cube_memory_is_bounded_by_its_rows():
+    """Sparse registers cost a few bytes per row, however many cells there are."""
+    rng = np.random.default_rng(3)
+    n = 100_000
+    lines = pd.DataFrame({
+        'OrderID': rng.integers(0, 30_000, n),
+        'OrderMonth': rng.integers(0, 24, n),
+        'Country': rng.choice([f"Country {i}" for i in range(21)], n),
+        'SupplierName': rng.choice([f"Supplier {i}" for i in range(29)], n),
+    })
+    cube = DistinctCountCube.build(lines, 'OrderID', ['OrderMonth', 'Country', 'SupplierName'], precision=14)
+    assert len(cube.cells) * 2 ** 14 > 100 * n  # Dense registers would take over 10 MB
+    assert cube.nbytes <= 16 * n
+    assert cube.count() == pytest.approx(lines['OrderID'].nunique(), rel=3 * hll_relative_error(14))
+
+def test_empty_selection_counts_zero(order_lines_df):
+    cube = DistinctCountCube.build(order_lines_df, 'OrderID', ['Country'])
+    assert cube.count(np.zeros(len(cube.cells), dtype=bool)) == 0
+
+@pytest.fixture(scope="module")
+def shipping_df() -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    n = 5_000
+    return pd.DataFrame({
+        'ShippingDays': rng.integers(0, 45, n),
+        'ShipperName': rng.choice(['Speedy Express', 'United Package', 'Federal Shipping'], n),
+    })
+
+def test_histogram_summary_matches_exact_statistics(shipping_df):
+    """Below the cap, histogram quantiles, means and breach rates are exact."""
+    cube = HistogramCube.build(shipping_df, 'ShippingDays', ['ShipperName'], max_value=60)
+    summary = cube.summarize([0.5, 0.9, 0.99], threshold=7, by='ShipperName')
+
+    for shipper, days in shipping_df.groupby('ShipperName')['ShippingDays']:
+        row = summary.loc[shipper]
+        assert row['Count'] == len(days)
+        assert row['Mean'] == pytest.approx(days.mean())
+        assert row['p50'] == days.quantile(0.5, interpolation='lower')
+        assert row['p90'] == days.quantile(0.9, interpolation='lower')
+        assert row['ExceedanceRate'] == pytest.approx((days > 7).mean())
+
+def test_histogram_incremental_update_and_cell_selection(shipping_df):
+    """Folding in new rows matches a full rebuild, and selection restricts cells."""
+    dims = ['ShipperName']
+    full = HistogramCube.build(shipping_df, 'ShippingDays', dims)
+    updated = HistogramCube.build(shipping_df.iloc[:3_000], 'ShippingDays', dims).update(shipping_df.iloc[3_000:], 'ShippingDays')
+    np.testing.assert_array_equal(updated.counts, full.counts)
+
+    # Replacing a cell's histogram (its rows were extracted again) also matches
+    replaced = (full.cells['ShipperName'] == 'United Package').to_numpy()
+    rows = shipping_df[shipping_df['ShipperName'] == 'United Package']
+    refreshed = full.update(rows, 'ShippingDays', replaced=replaced)
+    np.testing.assert_array_equal(refreshed.counts, full.counts)
+    np.testing.assert_array_equal(refreshed.sums, full.sums)
+
+    selected = full.select((full.cells['ShipperName'] == 'United Package').to_numpy())
+    overall = selected.summarize([0.5], threshold=7).iloc[0]
+    assert overall['Count'] == (shipping_df['ShipperName'] == 'United Package').sum()
+
+def test_histogram_ignores_negative_and_caps_large_values():
+    df = pd.DataFrame({'ShippingDays': [-3, 2, 4, 90], 'Country': ['UK'] * 4})
+    cube = HistogramCube.build(df, 'ShippingDays', ['Country'], max_value=60)
+    summary = cube.summarize([0.99], threshold=7).iloc[0]
+    assert summary['Count'] == 3
+    assert summary['p99'] == 60
@@ -0,0 +1,32 @@
+"""
+Unit tests for the server-side table paging.
+"""
+import numpy as np
+import pandas as pd
+from app.ui.tables import page_rows, search_mask
+
+def _lines_df() -> pd.DataFrame:
+    return pd.DataFrame({
+        'OrderID': [10248, 10249, 10250, 10251, 10252, 10253],
+        'ProductName': ['Queso Cabrales', 'Tofu', 'Chai', None, 'Chang', 'Queso Manchego'],
+        'Revenue': [168.0, 150.66, 168.0, 95.0, np.nan, 310.0],
+    })
+
+def test_pages_follow_a_stable_sort_with_missing_values_last():
+    df = _lines_df()
+    first, total = page_rows(df, page=1, page_size=4, sort_by='Revenue', ascending=False)
+    assert total == 6
+    assert list(first['OrderID']) == [10253, 10248, 10250, 10249]  # Ties keep their original order
+
+    last, _ = page_rows(df, page=2, page_size=4, sort_by='Revenue', ascending=False)
+    assert list(last['OrderID']) == [10251, 10252]
+    assert page_rows(df, page=3, page_size=4)[0].empty
+
+def test_search_is_case_insensitive_and_skips_missing_values():
+    df = _lines_df()
+    assert list(search_mask(df, "queso")) == [True, False, False, False, False, True]
+    assert search_mask(df, "").all()
+    assert not search_mask(df, "168", columns=['ProductName']).any()
+
+    rows, total = page_rows(df, page=1, page_size=10, sort_by='Revenue', ascending=True, query="QUESO")
+    assert total == 2 and list(rows['OrderID']) == [10248, 10253]
@@ -3,7 +3,7 @@ Unit tests for the main ETL transform function.
 """
 import pandas as pd
 import pytest
-from app.etl.transform import create_comprehensive_sales_data
+from app.etl.transform import create_comprehensive_sales_data, create_order_facts
 
 def test_create_comprehensive_sales_data(
     sample_orders_df, sample_order_details_df, sample_products_df,
@@ -54,4 +54,53 @@ def test_create_comprehensive_sales_data(
     assert order_10248_row['CountryISO3'] == 'DEU'
 
     # Assert that the ShippedDate column has the correct data type
-    assert pd.api.types.is_datetime64_any_dtype(result_df['ShippedDate'])
\ No newline at end of file
+    assert pd.api.types.is_datetime64_any_dtype(result_df['ShippedDate'])
+
+def test_create_order_facts():
+    """
+    Tests that line items collapse to one row per order with order-level measures.
+    """
+    sales_data = pd.DataFrame({
+        'OrderID': [10248, 10248, 10248, 10249],
+        'OrderDate': pd.to_datetime(['1996-07-04'] * 3 + ['1996-07-05']),
+        'ShippedDate': pd.to_datetime(['1996-07-16'] * 3 + [None]),
+        'CustomerID': ['VINET'] * 3 + ['TOMSP'],
+        'Country': ['France'] * 3 + ['Germany'],
+        'EmployeeName': ['Steven Buchanan'] * 3 + ['Michael Suyama'],
+        'Revenue': [168.0, 98.0, 174.0, 1863.4],
+    })
+
+    order_facts = create_order_facts(sales_data).set_index('OrderID')
+
+    # One row per order, with revenue summed and lines counted
+    assert len(order_facts) == 2
+    assert order_facts.loc[10248, 'Revenue'] == pytest.approx(440.0)
+    assert order_facts.loc[10248, 'LineCount'] == 3
+    assert order_facts.loc[10248, 'Country'] == 'France'
+
+    # Shipping days are computed once per order; unshipped orders stay missing
+    assert order_facts.loc[10248, 'ShippingDays'] == 12
+    assert pd.isna(order_facts.loc[10249, 'ShippingDays'])
+
+
+def test_create_comprehensive_sales_data_with_shippers(
+    sample_orders_df, sample_order_details_df, sample_products_df,
+    sample_categories_df, sample_employees_df, sample_customers_df, sample_suppliers_df,
+    sample_shippers_df
+):
+    """
+    Tests that the shipping company is joined when the Shippers table is provided.
+    """
+    result_df = create_comprehensive_sales_data(
+        orders=sample_orders_df.assign(ShipVia=[3, 1]),
+        order_details=sample_order_details_df.copy(),
+        products=sample_products_df,
+        categories=sample_categories_df,
+        employees=sample_employees_df,
+        customers=sample_customers_df,
+        suppliers=sample_suppliers_df,
+        shippers=sample_shippers_df
+    )
+
+    assert result_df[result_df['OrderID'] == 10248]['ShipperName'].iloc[0] == 'Federal Shipping'
+    assert result_df[result_df['OrderID'] == 10249]['ShipperName'].iloc[0] == 'Speedy Express'